@@ -1,4 +1,6 @@
 from functools import lru_cache
+from typing import Literal
+
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -13,11 +15,24 @@ class Settings(BaseSettings):
     redis_host: str = Field(default="localhost")
     redis_port: int = Field(default=6379)
     redis_password: str | None = None
+    redis_max_connections: int | None = None
     redis_index_name: str = Field(default="warehouse_index")
     redis_prefix: str = Field(default="doc")
+    metadata_tag_fields: tuple[str, ...] = Field(default=("site", "zone", "doc_type", "source"))
+    metadata_numeric_fields: tuple[str, ...] = Field(default=("effective_date",))
 
     embedding_model: str = Field(default="sentence-transformers/all-MiniLM-L6-v2")
     embedding_dimension: int = Field(default=384)
+    embedding_backend: str = Field(default="torch")
+    embedding_onnx_path: str = Field(default="models/all-MiniLM-L6-v2")
+    embedding_onnx_quantized: bool = Field(default=True)
+    embedding_max_length: int = Field(default=256)
+    embedding_threads: int = Field(default=0)
+    embedding_eager_load: bool = Field(default=True)
+    embedding_socket: str | None = None
+    embedding_sidecar_timeout: float = Field(default=30.0)
+    embedding_sidecar_max_batch: int = Field(default=64)
+    embedding_sidecar_wait_ms: float = Field(default=2.0)
 
     ollama_host: str = Field(default="http://localhost:11434")
     ollama_model: str = Field(default="mistral")
@@ -26,9 +41,18 @@ class Settings(BaseSettings):
     ollama_allowed_models: tuple[str, ...] = Field(
         default=("mistral", "llama3", "phi3", "gemma")
     )
+    # Host-wide; each of the ``web_concurrency`` uvicorn workers gets an equal share.
+    llm_max_concurrency: int = Field(default=4)
+    llm_reserved_interactive: int = Field(default=1)
+    batch_concurrency: int = Field(default=4)
+    batch_max_items: int = Field(default=2000)
+    web_concurrency: int = Field(default=1)
 
     top_k: int = Field(default=4)
     max_context_tokens: int = Field(default=1200)
+    relevance_min_similarity: float = Field(default=0.3)
+    relevance_cliff_gap: float = Field(default=0.15)
+    relevance_not_found_sources: int = Field(default=3)
     guard_blocklist: tuple[str, ...] = Field(
         default=(
             "ignore previous",
@@ -38,16 +62,39 @@ class Settings(BaseSettings):
         )
     )
 
+    session_prefix: str = Field(default="session")
+    session_max_turns: int = Field(default=20)
+    session_ttl_seconds: int = Field(default=1800)
+    session_history_token_budget: int = Field(default=600)
+    session_keep_turns: int = Field(default=2)
+
     pii_mask_token: str = Field(default="[REDACTED]")
     ingestion_namespace: str = Field(default="warehouse-knowledge")
     data_path: str = Field(default="data")
+    chunk_max_tokens: int = Field(default=200)
+    chunk_overlap_tokens: int = Field(default=24)
+    chunk_tokenizer: str | None = None
+    ingest_pdf_workers: int = Field(default=0)
+    ingest_csv_batch_rows: int = Field(default=500)
+    ingest_embed_batch: int = Field(default=256)
+    ingest_scan_workers: int = Field(default=16)
+    ingest_dedup: bool = Field(default=False)
+    ingest_dedup_threshold: float = Field(default=0.9)
+    ingest_dedup_embedding_similarity: float = Field(default=0.0)
+    ingest_dedup_scope: Literal["document", "request"] = Field(default="document")
+    manifest_prefix: str = Field(default="manifest")
 
     metrics_namespace: str = Field(default="rag_backend")
+    metrics_cache_seconds: float = Field(default=1.0)
+    runtime_metrics_interval: float = Field(default=1.0)
+    executor_workers: int = Field(default=0)
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 
-    @field_validator("ollama_allowed_models", mode="before")
+    @field_validator(
+        "ollama_allowed_models", "metadata_tag_fields", "metadata_numeric_fields", mode="before"
+    )
     @classmethod
     def _parse_models(cls, value: str | tuple[str, ...]):
         if isinstance(value, str):
@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 REQUEST_COUNTER = Counter(
     "rag_requests_total",
@@ -16,14 +16,91 @@ LLM_LATENCY = Histogram(
     "Latency for Ollama generations",
 )
 
+RELEVANCE_GATE_COUNTER = Counter(
+    "rag_relevance_gate_total",
+    "Relevance gate decisions; not_found answers skip the LLM",
+    labelnames=("decision",),
+)
+
+RETRIEVAL_BEST_SIMILARITY = Histogram(
+    "rag_retrieval_best_similarity",
+    "Cosine similarity of the best retrieved chunk",
+    buckets=tuple(step / 20 for step in range(1, 21)),
+)
+
+RELEVANCE_CHUNKS_DROPPED = Counter(
+    "rag_relevance_chunks_dropped_total",
+    "Retrieved chunks cut by adaptive top_k",
+)
+
 PROMPT_GUARD_COUNTER = Counter(
     "rag_guard_hits_total",
     "Number of times prompt guard blocked or flagged input",
     labelnames=("action",),
 )
 
+PII_REDACTION_COUNTER = Counter(
+    "rag_pii_redactions_total",
+    "PII matches masked in LLM answers",
+    labelnames=("rule",),
+)
+
+EMBEDDING_LATENCY = Histogram(
+    "rag_embedding_latency_seconds",
+    "Latency for embedding a batch of texts",
+    labelnames=("backend",),
+)
+
+EMBEDDING_LOAD_SECONDS = Gauge(
+    "rag_embedding_load_seconds",
+    "Time spent loading the embedding model at startup",
+    labelnames=("backend",),
+    multiprocess_mode="max",
+)
+
+SIDECAR_BATCH_SIZE = Histogram(
+    "rag_embedding_sidecar_batch_texts",
+    "Texts per model call in the embedding sidecar",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+
 MODEL_USAGE_COUNTER = Counter(
     "rag_model_usage_total",
     "How often each model is used for chat responses",
     labelnames=("model",),
 )
+
+INGEST_BYTES = Counter(
+    "rag_ingest_bytes_total",
+    "Bytes read by the document parsers during ingestion",
+)
+
+INGEST_PAGES = Counter(
+    "rag_ingest_pages_total",
+    "PDF pages extracted during ingestion",
+)
+
+INGEST_DUPLICATES = Counter(
+    "rag_ingest_duplicates_total",
+    "Near-duplicate chunks collapsed into an existing chunk at ingestion",
+    labelnames=("stage",),
+)
+
+EVENT_LOOP_LAG = Gauge(
+    "rag_event_loop_lag_seconds",
+    "Delay of a scheduled event-loop wakeup; the worst live worker in multiprocess mode",
+    multiprocess_mode="livemax",
+)
+
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "rag_executor_queue_depth",
+    "Calls waiting for a thread in the default executor (asyncio.to_thread)",
+    multiprocess_mode="livesum",
+)
+
+REDIS_POOL_CONNECTIONS = Gauge(
+    "rag_redis_pool_connections",
+    "Redis connections held by the client pool",
+    labelnames=("state",),
+    multiprocess_mode="livesum",
+)
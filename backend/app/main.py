@@ -1,24 +1,53 @@
 from __future__ import annotations
 
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from dataclasses import replace
 from pathlib import Path
 
 import redis
 import structlog
-from fastapi import Depends, FastAPI, HTTPException, Request
-from fastapi.responses import PlainTextResponse
-from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST
 
 from .config import Settings, get_settings
 from .logging_config import configure_logging
-from .schemas import AuditRecord, ChatRequest, ChatResponse, HealthResponse, IngestRequest, IngestResponse
+from .schemas import (
+    AuditRecord,
+    BatchChatRequest,
+    BatchChatResult,
+    ChatRequest,
+    ChatResponse,
+    HealthResponse,
+    IngestDocument,
+    IngestRequest,
+    IngestResponse,
+    ReadyResponse,
+)
 from .services.audit import AuditTrail
-from .services.embedding import EmbeddingService
+from .services.chunking import TokenWindowSplitter, default_splitters, tokenizer_source
+from .services.dedup import ChunkDeduplicator
+from .services.embedding import EmbeddingService, build_backend
+from .services.embedding_sidecar import SidecarBackend
 from .services.guards import PIIRedactor, PromptGuard
-from .services.ingestion import Chunker, DocumentParser, IngestionService
+from .services.ingestion import (
+    BatchWriter,
+    ChunkSourceError,
+    DocumentParser,
+    IngestionService,
+    ThroughputTracker,
+)
+from .services.manifest import FileManifest, ScannedFile, SourceScanner
 from .services.ollama import OllamaClient
 from .services.pipeline import RagPipeline
-from .services.vector_store import RedisVectorStore
+from .services.relevance import RelevanceGate
+from .services.runtime_metrics import MetricsExporter, RuntimeMonitor
+from .services.scheduler import PrioritySlots
+from .services.sessions import HistorySummarizer, SessionStore
+from .services.vector_store import FilterError, MetadataSchema, RedisVectorStore
 
 logger = structlog.get_logger(__name__)
 
@@ -37,23 +66,60 @@ async def lifespan(app: FastAPI):
     configure_logging(settings.log_level)
     logger.info("starting_app", env=settings.environment)
 
+    # asyncio.to_thread runs on this executor; RuntimeMonitor reports its backlog.
+    executor = ThreadPoolExecutor(
+        max_workers=settings.executor_workers or None, thread_name_prefix="rag-worker"
+    )
+    asyncio.get_running_loop().set_default_executor(executor)
+
     redis_client = redis.Redis(
         host=settings.redis_host,
         port=settings.redis_port,
         password=settings.redis_password,
+        max_connections=settings.redis_max_connections,
         decode_responses=False,
     )
     vector_store = RedisVectorStore(
         redis_client,
         index_name=settings.redis_index_name,
         dim=settings.embedding_dimension,
+        metadata_schema=MetadataSchema(
+            tag_fields=settings.metadata_tag_fields,
+            numeric_fields=settings.metadata_numeric_fields,
+        ),
     )
     vector_store.ensure_index()
 
-    embedding_service = EmbeddingService(settings.embedding_model)
+    embedding_backend = build_backend(
+        settings.embedding_backend,
+        settings.embedding_model,
+        onnx_path=settings.embedding_onnx_path,
+        quantized=settings.embedding_onnx_quantized,
+        max_length=settings.embedding_max_length,
+        threads=settings.embedding_threads,
+    )
+    if settings.embedding_socket:
+        embedding_backend = SidecarBackend(
+            settings.embedding_socket,
+            fallback=embedding_backend,
+            timeout=settings.embedding_sidecar_timeout,
+        )
+    embedding_service = EmbeddingService(settings.embedding_model, backend=embedding_backend)
+    warmup = (
+        asyncio.create_task(_load_embedding(embedding_service))
+        if settings.embedding_eager_load
+        else None
+    )
+    window = _chunk_window(settings)
+    tokenizer_warmup = asyncio.create_task(_load_chunk_tokenizer(window))
     ingestion_service = IngestionService(
-        parser=DocumentParser(base_path=Path(settings.data_path)),
-        chunker=Chunker(),
+        parser=DocumentParser(
+            base_path=Path(settings.data_path),
+            pdf_workers=settings.ingest_pdf_workers,
+            csv_batch_rows=settings.ingest_csv_batch_rows,
+        ),
+        chunker=window,
+        splitters=default_splitters(window),
     )
     ollama_client = OllamaClient(
         base_url=settings.ollama_host,
@@ -69,25 +135,105 @@ async def lifespan(app: FastAPI):
         guard=guard,
         redactor=redactor,
         max_context_chars=settings.max_context_tokens,
+        sessions=SessionStore(
+            redis_client,
+            prefix=settings.session_prefix,
+            max_turns=settings.session_max_turns,
+            ttl_seconds=settings.session_ttl_seconds,
+        ),
+        summarizer=HistorySummarizer(
+            ollama_client,
+            token_budget=settings.session_history_token_budget,
+            keep_turns=settings.session_keep_turns,
+        ),
+        relevance=RelevanceGate(
+            min_similarity=settings.relevance_min_similarity,
+            cliff_gap=settings.relevance_cliff_gap,
+            not_found_sources=settings.relevance_not_found_sources,
+        ),
+        scheduler=PrioritySlots(
+            max(1, settings.llm_max_concurrency // max(1, settings.web_concurrency)),
+            reserved=settings.llm_reserved_interactive,
+        ),
     )
     audit_trail = AuditTrail(Path("logs/audit.log"))
+    metrics_exporter = MetricsExporter(
+        ttl=settings.metrics_cache_seconds,
+        # prometheus_client reads this at import time, so it has to be a real process env var.
+        multiproc_dir=os.environ.get("PROMETHEUS_MULTIPROC_DIR"),
+    )
+    monitor = asyncio.create_task(
+        RuntimeMonitor(
+            interval=settings.runtime_metrics_interval,
+            executor=executor,
+            redis_pool=redis_client.connection_pool,
+        ).run()
+    )
 
     app.state.redis = redis_client
     app.state.vector_store = vector_store
     app.state.embedding = embedding_service
     app.state.ingestion_service = ingestion_service
+    app.state.manifest = FileManifest(redis_client, prefix=settings.manifest_prefix)
+    app.state.scanner = SourceScanner(
+        Path(settings.data_path), max_workers=settings.ingest_scan_workers
+    )
     app.state.pipeline = pipeline
     app.state.audit = audit_trail
+    app.state.metrics = metrics_exporter
     app.state.settings = settings
 
     try:
         yield
     finally:
+        if warmup is not None:
+            warmup.cancel()
+        tokenizer_warmup.cancel()
+        monitor.cancel()
+        metrics_exporter.close()
         await ollama_client.aclose()
+        if isinstance(embedding_backend, SidecarBackend):
+            embedding_backend.close()
+        ingestion_service.parser.close()
         redis_client.close()
+        await asyncio.get_running_loop().shutdown_default_executor()
         logger.info("shutdown_complete")
 
 
+def _chunk_window(settings: Settings) -> TokenWindowSplitter:
+    # Count chunk budgets in the embedding model's wordpieces so nothing is truncated at embed time.
+    return TokenWindowSplitter(
+        max_tokens=min(settings.chunk_max_tokens, settings.embedding_max_length - 2),
+        overlap_tokens=settings.chunk_overlap_tokens,
+        tokenizer_source=tokenizer_source(
+            settings.chunk_tokenizer, settings.embedding_onnx_path, settings.embedding_model
+        ),
+    )
+
+
+async def _load_chunk_tokenizer(window: TokenWindowSplitter) -> None:
+    source = window.tokenizer_source
+    try:
+        # May download from the hub; an ingest arriving earlier waits on the splitter's lock.
+        await asyncio.to_thread(window.load)
+    except Exception as exc:
+        logger.warning(
+            "chunk_tokenizer_unavailable",
+            source=str(source),
+            error=str(exc),
+            max_tokens=window.max_tokens,
+        )
+
+
+async def _load_embedding(embedding: EmbeddingService) -> None:
+    try:
+        seconds = await asyncio.to_thread(embedding.load)
+    except Exception:
+        logger.exception("embedding_load_failed", backend=embedding.backend.name)
+        return
+    logger.info("embedding_loaded", backend=embedding.backend.name, seconds=round(seconds, 3))
+
+
 app = FastAPI(title="Warehouse Knowledge Assistant", lifespan=lifespan)
 
 
@@ -101,6 +247,26 @@ def health(settings: Settings = Depends(get_settings_dependency)) -> HealthRespo
     return HealthResponse(redis=redis_ok, model=settings.ollama_model)
 
 
+@app.get("/ready", response_model=ReadyResponse)
+def ready(request: Request, response: Response) -> ReadyResponse:
+    embedding: EmbeddingService = request.app.state.embedding
+    redis_ok = False
+    try:
+        redis_ok = bool(request.app.state.redis.ping())
+    except Exception:  # pragma: no cover - best effort
+        redis_ok = False
+    is_ready = redis_ok and embedding.ready
+    if not is_ready:
+        response.status_code = 503
+    return ReadyResponse(
+        status="ready" if is_ready else "starting",
+        redis=redis_ok,
+        embedding=embedding.ready,
+        embedding_backend=embedding.backend.name,
+        embedding_load_seconds=embedding.load_seconds,
+    )
+
+
 @app.post("/ingest", response_model=IngestResponse)
 def ingest(
     payload: IngestRequest,
@@ -112,15 +278,112 @@ def ingest(
     embedding: EmbeddingService = request.app.state.embedding
     vector_store: RedisVectorStore = request.app.state.vector_store
 
-    prepared: list[dict] = []
+    if payload.sources and settings.ingest_dedup and settings.ingest_dedup_scope == "request":
+        # Cross-document merges live only in this request; a later sync that deletes or
+        # rewrites the kept chunk would silently drop the merged copies of unchanged files.
+        raise HTTPException(
+            status_code=400,
+            detail="INGEST_DEDUP_SCOPE=request cannot be combined with sources; use documents",
+        )
+    tracker = ThroughputTracker()
+    writer = BatchWriter(
+        embedding,
+        vector_store,
+        namespace,
+        batch_size=settings.ingest_embed_batch,
+        dedup=_deduplicator(settings, vector_store) if settings.ingest_dedup else None,
+    )
     for doc in payload.documents:
-        prepared.extend(ingestion_service.prepare(doc))
-    embeddings = embedding.embed([chunk["text"] for chunk in prepared])
-    for chunk, vector in zip(prepared, embeddings):
-        chunk["embedding"] = vector
-    count = vector_store.upsert(namespace=namespace, documents=prepared)
-    logger.info("ingested", count=count, namespace=namespace)
-    return IngestResponse(ingested=count, namespace=namespace)
+        writer.write(ingestion_service.iter_prepare(doc, tracker))
+
+    stats: dict = {}
+    if payload.sources:
+        manifest: FileManifest = request.app.state.manifest
+        scanner: SourceScanner = request.app.state.scanner
+        known = manifest.load(namespace)
+        files_changed = files_unchanged = files_removed = 0
+        failed: dict[str, str] = {}
+        for source in payload.sources:
+            try:
+                scan = scanner.scan(
+                    source.path, known, recursive=source.recursive, force=source.force
+                )
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail=str(exc))
+            except FileNotFoundError:
+                raise HTTPException(status_code=404, detail=f"Source {source.path} not found")
+            manifest.record(namespace, {item.relative: item.fingerprint for item in scan.touched})
+            for relative, fingerprint in scan.removed.items():
+                doc_id = _source_doc_id(namespace, relative)
+                vector_store.delete_chunks(doc_id, 0, fingerprint.chunks)
+                known.pop(relative, None)
+            manifest.forget(namespace, list(scan.removed))
+            for scanned in scan.changed:
+                doc = IngestDocument(
+                    id=_source_doc_id(namespace, scanned.relative),
+                    path=str(scanned.path),
+                    mime_type=source.mime_type,
+                    metadata={**(source.metadata or {}), "source": scanned.relative},
+                )
+                try:
+                    writer.write(
+                        ingestion_service.iter_prepare(doc, tracker),
+                        on_stored=_manifest_updater(manifest, namespace, scanned, vector_store),
+                    )
+                except ChunkSourceError as exc:
+                    # The manifest keeps the old fingerprint, so the next sync retries the file.
+                    logger.warning("ingest_file_failed", source=scanned.relative, error=str(exc))
+                    failed[scanned.relative] = str(exc)
+            files_changed += len(scan.changed)
+            files_unchanged += scan.unchanged
+            files_removed += len(scan.removed)
+        stats.update(
+            files_changed=files_changed,
+            files_unchanged=files_unchanged,
+            files_removed=files_removed,
+            files_failed=len(failed),
+        )
+        if failed:
+            stats["errors"] = failed
+
+    writer.flush()
+    stats.update(tracker.snapshot())
+    if writer.dedup is not None:
+        stats.update(writer.dedup.stats.snapshot())
+    logger.info("ingested", count=writer.count, namespace=namespace, **stats)
+    return IngestResponse(ingested=writer.count, namespace=namespace, stats=stats)
+
+
+def _deduplicator(settings: Settings, vector_store: RedisVectorStore) -> ChunkDeduplicator:
+    return ChunkDeduplicator(
+        settings.ingest_dedup_threshold,
+        embedding_similarity=settings.ingest_dedup_embedding_similarity,
+        per_document=settings.ingest_dedup_scope != "request",
+        merge_fields=vector_store.metadata_schema.tag_fields,
+        partition_fields=vector_store.metadata_schema.numeric_fields,
+    )
+
+
+def _source_doc_id(namespace: str, relative: str) -> str:
+    # The manifest is kept per namespace, so chunk keys of synced files must be as well.
+    return f"{namespace}:{relative}"
+
+
+def _manifest_updater(
+    manifest: FileManifest,
+    namespace: str,
+    scanned: ScannedFile,
+    vector_store: RedisVectorStore,
+):
+    def update(chunks: int) -> None:
+        previous_chunks = scanned.previous.chunks if scanned.previous else 0
+        if previous_chunks > chunks:
+            vector_store.delete_chunks(
+                _source_doc_id(namespace, scanned.relative), chunks, previous_chunks
+            )
+        manifest.record(namespace, {scanned.relative: replace(scanned.fingerprint, chunks=chunks)})
+
+    return update
 
 
 @app.post("/chat", response_model=ChatResponse)
@@ -137,25 +400,84 @@ async def chat(
     temperature = payload.temperature if payload.temperature is not None else settings.ollama_temperature
     try:
         response = await pipeline.chat(payload, namespace, model=model, temperature=temperature)
+    except FilterError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     except TimeoutError:
         raise HTTPException(status_code=504, detail="LLM generation timed out")
     except RuntimeError as exc:
         raise HTTPException(status_code=502, detail=str(exc))
 
+    _audit(request.app.state.audit, payload.query, response, namespace)
+    return response
+
+
+@app.post("/chat/batch")
+async def chat_batch(
+    payload: BatchChatRequest,
+    request: Request,
+    pipeline: RagPipeline = Depends(get_pipeline),
+    settings: Settings = Depends(get_settings_dependency),
+) -> StreamingResponse:
+    namespace = payload.namespace or settings.ingestion_namespace
+    model = payload.model or settings.ollama_model
+    if model not in settings.ollama_allowed_models:
+        raise HTTPException(status_code=400, detail="Unsupported model requested")
+    if len(payload.items) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=400, detail=f"At most {settings.batch_max_items} items per batch"
+        )
+    vector_store: RedisVectorStore = request.app.state.vector_store
+    try:
+        for item in payload.items:
+            vector_store.metadata_schema.compile(item.filters)
+    except FilterError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    temperature = (
+        payload.temperature if payload.temperature is not None else settings.ollama_temperature
+    )
+    concurrency = min(payload.concurrency or settings.batch_concurrency, settings.batch_concurrency)
+    requests = [
+        ChatRequest(
+            query=item.query,
+            top_k=item.top_k,
+            min_similarity=item.min_similarity,
+            filters=item.filters,
+            guard_level=payload.guard_level,
+        )
+        for item in payload.items
+    ]
     audit: AuditTrail = request.app.state.audit
+
+    async def results():
+        async for index, outcome in pipeline.chat_many(
+            requests, namespace, model=model, temperature=temperature, concurrency=concurrency
+        ):
+            item = payload.items[index]
+            if isinstance(outcome, Exception):
+                result = BatchChatResult(
+                    index=index, id=item.id, error=str(outcome) or type(outcome).__name__
+                )
+            else:
+                _audit(audit, item.query, outcome, namespace)
+                result = BatchChatResult(index=index, id=item.id, response=outcome)
+            yield result.model_dump_json(exclude_none=True) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+def _audit(audit: AuditTrail, query: str, response: ChatResponse, namespace: str) -> None:
     audit.write(
         AuditRecord(
-            query=payload.query,
+            query=query,
             response=response.answer,
             guard_tripped=response.guard_tripped,
             namespace=namespace,
             sources=[source.model_dump() for source in response.sources],
         )
     )
-    return response
 
 
 @app.get("/metrics")
-def metrics() -> PlainTextResponse:
-    data = generate_latest()
-    return PlainTextResponse(data.decode("utf-8"), media_type=CONTENT_TYPE_LATEST)
+async def metrics(request: Request) -> Response:
+    data = await request.app.state.metrics.render()
+    return Response(data, media_type=CONTENT_TYPE_LATEST)
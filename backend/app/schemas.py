@@ -10,6 +10,14 @@ class HealthResponse(BaseModel):
     model: str
 
 
+class ReadyResponse(BaseModel):
+    status: str
+    redis: bool
+    embedding: bool
+    embedding_backend: str
+    embedding_load_seconds: float | None = None
+
+
 class IngestDocument(BaseModel):
     id: str | None = None
     text: str | None = None
@@ -24,14 +32,32 @@ class IngestDocument(BaseModel):
         return self
 
 
+class IngestSource(BaseModel):
+    path: str = Field(description="Directory or glob pattern below the data path")
+    recursive: bool = Field(
+        default=True, description="Descend into subdirectories; false rejects '**' patterns"
+    )
+    mime_type: str | None = None
+    metadata: dict[str, Any] | None = None
+    force: bool = Field(default=False, description="Re-ingest even if the manifest matches")
+
+
 class IngestRequest(BaseModel):
     namespace: str | None = None
-    documents: list[IngestDocument]
+    documents: list[IngestDocument] = Field(default_factory=list)
+    sources: list[IngestSource] = Field(default_factory=list)
+
+    @model_validator(mode="after")
+    def validate_inputs(self) -> "IngestRequest":
+        if not self.documents and not self.sources:
+            raise ValueError("Either documents or sources must be provided")
+        return self
 
 
 class IngestResponse(BaseModel):
     ingested: int
     namespace: str
+    stats: dict[str, Any] = Field(default_factory=dict)
 
 
 class SourceChunk(BaseModel):
@@ -48,15 +74,56 @@ class ChatRequest(BaseModel):
     guard_level: str | None = Field(default="standard", description="standard|strict|disabled")
     model: str | None = Field(default=None, description="Override default Ollama model")
     temperature: float | None = Field(default=None, ge=0.0, le=1.0)
+    min_similarity: float | None = Field(
+        default=None, ge=0.0, le=1.0, description="Override the relevance gate threshold"
+    )
+    filters: dict[str, Any] | None = Field(
+        default=None,
+        description=(
+            'Metadata pre-filter, e.g. {"site": "hamburg", "zone": ["C1", "C2"], '
+            '"effective_date": {"lte": "2024-06-30"}}'
+        ),
+    )
+    session_id: str | None = Field(
+        default=None,
+        max_length=128,
+        pattern=r"^[A-Za-z0-9_.-]+$",
+        description="Conversation id; follow-up questions reuse the stored history",
+    )
 
 
 class ChatResponse(BaseModel):
     answer: str
     sources: list[SourceChunk]
     guard_tripped: bool = False
+    session_id: str | None = None
     stats: dict[str, Any] = Field(default_factory=dict)
 
 
+class BatchChatItem(BaseModel):
+    id: str | None = Field(default=None, description="Caller reference echoed in the result")
+    query: str
+    top_k: int | None = None
+    min_similarity: float | None = Field(default=None, ge=0.0, le=1.0)
+    filters: dict[str, Any] | None = None
+
+
+class BatchChatRequest(BaseModel):
+    items: list[BatchChatItem] = Field(min_length=1)
+    namespace: str | None = None
+    guard_level: str | None = Field(default="standard", description="standard|strict|disabled")
+    model: str | None = None
+    temperature: float | None = Field(default=None, ge=0.0, le=1.0)
+    concurrency: int | None = Field(default=None, ge=1, description="Parallel generations")
+
+
+class BatchChatResult(BaseModel):
+    index: int
+    id: str | None = None
+    response: ChatResponse | None = None
+    error: str | None = None
+
+
 class AuditRecord(BaseModel):
     query: str
     response: str
@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import re
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
+
+if TYPE_CHECKING:  # pragma: no cover
+    from tokenizers import Tokenizer
+
+DEFAULT_MAX_TOKENS = 120
+MAX_CACHED_WORDS = 200_000
+SENTENCE_BOUNDARY_REGEX = re.compile(r"(?<=[.!?])\s+")
+HEADING_REGEX = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+
+
+@dataclass
+class Chunk:
+    text: str
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    start = 0
+    length = len(text)
+    while start < length:
+        end = text.find("\n", start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def load_tokenizer(source: str | Path) -> "Tokenizer":
+    """Fast tokenizer from a ``tokenizer.json``, a directory holding one, or a hub model name."""
+    from tokenizers import Tokenizer
+
+    path = Path(source)
+    if path.is_dir():
+        path = path / "tokenizer.json"
+    tokenizer = (
+        Tokenizer.from_file(str(path)) if path.is_file() else Tokenizer.from_pretrained(str(source))
+    )
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
+
+
+def tokenizer_source(explicit: str | None, onnx_dir: str | Path, model_name: str) -> str | Path:
+    """Explicit source, else the ONNX export's local ``tokenizer.json``, else the hub model."""
+    if explicit:
+        return explicit
+    local = Path(onnx_dir) / "tokenizer.json"
+    return local if local.is_file() else model_name
+
+
+def _whitespace_costs(words: list[str]) -> list[int]:
+    return [1] * len(words)
+
+
+class Splitter(ABC):
+    """Turns a stream of text lines into chunks without materializing the whole document."""
+
+    @abstractmethod
+    def chunks(self, lines: Iterable[str]) -> Iterator[Chunk]:
+        """Yields chunks while consuming ``lines`` lazily."""
+
+    def split_text(self, text: str) -> Iterator[Chunk]:
+        return self.chunks(iter_lines(text))
+
+
+class Chunker(Splitter):
+    """Fixed character windows with overlap; the original splitter."""
+
+    def __init__(self, chunk_size: int = 600, overlap: int = 80) -> None:
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    def split(self, text: str) -> list[str]:
+        chunks: list[str] = []
+        start = 0
+        length = len(text)
+        while start < length:
+            end = min(length, start + self.chunk_size)
+            chunk = text[start:end].strip()
+            if chunk:
+                chunks.append(chunk)
+            if end == length:
+                break
+            start = max(0, end - self.overlap)
+        return chunks
+
+    def chunks(self, lines: Iterable[str]) -> Iterator[Chunk]:
+        buffer = ""
+        pending = False
+        for line in lines:
+            buffer = f"{buffer}\n{line}" if pending else line
+            pending = True
+            start = 0
+            while len(buffer) - start > self.chunk_size:
+                chunk = buffer[start : start + self.chunk_size].strip()
+                if chunk:
+                    yield Chunk(chunk)
+                start += self.chunk_size - self.overlap
+            buffer = buffer[start:]
+        if buffer.strip():
+            yield Chunk(buffer.strip())
+
+
+class _TokenWindow:
+    def __init__(
+        self,
+        max_tokens: int,
+        overlap_tokens: int,
+        count_words: Callable[[list[str]], list[int]] = _whitespace_costs,
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_words = count_words
+        # Tokens taken by a prefix added to every chunk, e.g. the markdown heading path.
+        self.reserved = 0
+        self._sentences: list[tuple[str, int]] = []
+        self._tokens = 0
+        self._fresh = 0
+
+    @property
+    def budget(self) -> int:
+        return max(1, self.max_tokens - self.reserved)
+
+    def push(self, line: str) -> Iterator[str]:
+        for sentence in SENTENCE_BOUNDARY_REGEX.split(line.strip()):
+            words = sentence.split()
+            if not words:
+                continue
+            costs = self.count_words(words)
+            count = sum(costs)
+            while count > self.budget:
+                cut = _fitting_prefix(costs, self.budget)
+                yield from self._add(" ".join(words[:cut]), sum(costs[:cut]))
+                keep = max(1, cut - _fitting_suffix(costs[:cut], self.overlap_tokens))
+                words, costs = words[keep:], costs[keep:]
+                count = sum(costs)
+                sentence = " ".join(words)
+            yield from self._add(sentence, count)
+
+    def flush(self) -> Iterator[str]:
+        if self._fresh:
+            yield " ".join(sentence for sentence, _ in self._sentences)
+        self._sentences = []
+        self._tokens = 0
+        self._fresh = 0
+
+    def _add(self, sentence: str, count: int) -> Iterator[str]:
+        if self._fresh and self._tokens + count > self.budget:
+            yield " ".join(text for text, _ in self._sentences)
+            carried: list[tuple[str, int]] = []
+            carried_tokens = 0
+            for text, tokens in reversed(self._sentences):
+                if carried_tokens + tokens > self.overlap_tokens:
+                    break
+                carried.insert(0, (text, tokens))
+                carried_tokens += tokens
+            self._sentences = carried
+            self._tokens = carried_tokens
+            self._fresh = 0
+        while self._sentences and self._tokens + count > self.budget:
+            self._tokens -= self._sentences.pop(0)[1]
+        self._sentences.append((sentence, count))
+        self._tokens += count
+        self._fresh += 1
+
+
+def _fitting_prefix(costs: list[int], budget: int) -> int:
+    total = 0
+    for index, cost in enumerate(costs):
+        total += cost
+        if total > budget:
+            return max(1, index)
+    return len(costs)
+
+
+def _fitting_suffix(costs: list[int], budget: int) -> int:
+    total = 0
+    for count, cost in enumerate(reversed(costs[1:])):
+        total += cost
+        if total > budget:
+            return count
+    return len(costs) - 1
+
+
+class TokenWindowSplitter(Splitter):
+    """Packs whole sentences into windows of at most ``max_tokens`` tokens.
+
+    With a ``tokenizer`` the budget is counted in the embedding model's wordpieces, so chunks
+    are never truncated at embed time; without one every whitespace-separated word counts once.
+    A ``tokenizer_source`` is loaded by ``load`` (which may hit the network) or on first use.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        overlap_tokens: int = 16,
+        tokenizer: "Tokenizer | None" = None,
+        tokenizer_source: str | Path | None = None,
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.tokenizer = tokenizer
+        self.tokenizer_source = tokenizer_source if tokenizer is None else None
+        self._lock = threading.Lock()
+        self._costs: dict[str, int] = {}
+
+    def load(self) -> None:
+        with self._lock:
+            if self.tokenizer_source is None:
+                return
+            try:
+                self.tokenizer = load_tokenizer(self.tokenizer_source)
+            except Exception:
+                # Whitespace words undercount wordpieces, so fall back to the conservative budget.
+                self.max_tokens = min(self.max_tokens, DEFAULT_MAX_TOKENS)
+                raise
+            finally:
+                self.tokenizer_source = None
+
+    def count_words(self, words: list[str]) -> list[int]:
+        if self.tokenizer_source is not None:
+            self.load()
+        if self.tokenizer is None:
+            return _whitespace_costs(words)
+        # Each encode_batch call has a fixed overhead far above a dict lookup, and the vocabulary
+        # of a corpus repeats, so word costs are cached. The dict is replaced, never cleared,
+        # so concurrent callers keep a consistent view.
+        known = self._costs
+        fresh: dict[str, int] = {}
+        pending = [word for word in dict.fromkeys(words) if word not in known]
+        if pending:
+            encodings = self.tokenizer.encode_batch(pending, add_special_tokens=False)
+            fresh = {word: max(1, len(item.ids)) for word, item in zip(pending, encodings)}
+            if len(known) + len(fresh) > MAX_CACHED_WORDS:
+                self._costs = dict(fresh)
+            else:
+                known.update(fresh)
+        return [fresh[word] if word in fresh else known[word] for word in words]
+
+    def chunks(self, lines: Iterable[str]) -> Iterator[Chunk]:
+        window = self.window()
+        for line in lines:
+            for text in window.push(line):
+                yield Chunk(text)
+        for text in window.flush():
+            yield Chunk(text)
+
+    def window(self) -> _TokenWindow:
+        if self.tokenizer_source is not None:
+            self.load()
+        return _TokenWindow(self.max_tokens, self.overlap_tokens, self.count_words)
+
+
+class MarkdownHeadingSplitter(Splitter):
+    """Splits at markdown headings and tags every chunk with its heading path."""
+
+    def __init__(self, window: TokenWindowSplitter | None = None) -> None:
+        self.window_splitter = window or TokenWindowSplitter()
+
+    def chunks(self, lines: Iterable[str]) -> Iterator[Chunk]:
+        headings: list[tuple[int, str]] = []
+        window = self.window_splitter.window()
+        in_fence = False
+        for line in lines:
+            if line.lstrip().startswith(("```", "~~~")):
+                in_fence = not in_fence
+            match = None if in_fence or not line.startswith("#") else HEADING_REGEX.match(line)
+            if match is None:
+                for text in window.push(line):
+                    yield self._chunk(text, headings)
+                continue
+            for text in window.flush():
+                yield self._chunk(text, headings)
+            level = len(match.group(1))
+            headings = [item for item in headings if item[0] < level]
+            headings.append((level, match.group(2)))
+            path = " > ".join(title for _, title in headings)
+            window.reserved = sum(self.window_splitter.count_words(path.split()))
+        for text in window.flush():
+            yield self._chunk(text, headings)
+
+    def _chunk(self, text: str, headings: list[tuple[int, str]]) -> Chunk:
+        if not headings:
+            return Chunk(text)
+        path = " > ".join(title for _, title in headings)
+        return Chunk(
+            f"{path}\n{text}",
+            {"section": headings[-1][1], "heading_path": path},
+        )
+
+
+class CsvRowGroupSplitter(Splitter):
+    """Groups rendered CSV rows without ever cutting a row in half."""
+
+    def __init__(self, rows_per_chunk: int = 20, max_chars: int = 1200) -> None:
+        self.rows_per_chunk = rows_per_chunk
+        self.max_chars = max_chars
+
+    def chunks(self, lines: Iterable[str]) -> Iterator[Chunk]:
+        group: list[str] = []
+        size = 0
+        first_row = 0
+        row = 0
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if group and (len(group) >= self.rows_per_chunk or size + len(line) > self.max_chars):
+                yield self._chunk(group, first_row)
+                group, size, first_row = [], 0, row
+            group.append(line)
+            size += len(line) + 1
+            row += 1
+        if group:
+            yield self._chunk(group, first_row)
+
+    def _chunk(self, group: list[str], first_row: int) -> Chunk:
+        return Chunk(
+            "\n".join(group),
+            {"row_start": first_row, "row_end": first_row + len(group) - 1},
+        )
+
+
+def default_splitters(window: TokenWindowSplitter | None = None) -> dict[str, Splitter]:
+    window = window or TokenWindowSplitter()
+    return {
+        "markdown": MarkdownHeadingSplitter(window),
+        "csv": CsvRowGroupSplitter(),
+        "pdf": window,
+        "text": window,
+    }
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+import numpy as np
+
+from ..instrumentation import INGEST_DUPLICATES
+
+MERSENNE_PRIME = (1 << 61) - 1
+SHINGLE_SIZE = 3
+MAX_PROVENANCE = 20
+ISO_DATETIME = r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?"
+TIMESTAMP_REGEX = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?"
+    r"|\b\d{1,2}\.\d{1,2}\.\d{2,4}\b"
+    r"|\b\d{1,2}:\d{2}(?::\d{2})?\b"
+)
+# Export timestamps are the usual difference between otherwise identical rows, so they are
+# masked where they are a whole CSV field (``key=value`` as rendered by the parser) or lead a
+# log line. Dates and times in prose are facts and stay part of the text.
+RECORD_TIMESTAMP_REGEX = re.compile(
+    rf"(^|, )(\w+=)(?:{TIMESTAMP_REGEX.pattern})(?=,|$)|^(\s*\[?)(?:{ISO_DATETIME})", re.MULTILINE
+)
+WORD_REGEX = re.compile(r"\w+")
+
+
+def mask_timestamps(text: str) -> str:
+    return RECORD_TIMESTAMP_REGEX.sub(
+        lambda match: f"{match[1] or ''}{match[2] or ''}{match[3] or ''} ts ", text
+    )
+
+
+def prose_timestamps(text: str) -> tuple[str, ...]:
+    """Dates and times left after masking; chunks only collapse if these agree."""
+    return tuple(TIMESTAMP_REGEX.findall(mask_timestamps(text)))
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set[str]:
+    words = WORD_REGEX.findall(mask_timestamps(text).lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[idx : idx + size]) for idx in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures over word shingles; matching slots estimate Jaccard similarity."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1) -> None:
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(item.encode("utf-8")) for item in shingles(text)), dtype=np.uint64
+        )
+        # uint64 arithmetic wraps; the result is still a good universal hash family.
+        return ((np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME).min(axis=0)
+
+
+class SimHasher:
+    """Random-hyperplane signs of an embedding; equal bits track cosine similarity."""
+
+    def __init__(self, dim: int, bits: int = 128, seed: int = 1) -> None:
+        self.planes = np.random.default_rng(seed).standard_normal((dim, bits)).astype(np.float32)
+
+    def signature(self, vector: np.ndarray) -> np.ndarray:
+        return vector @ self.planes > 0
+
+
+class _LshIndex:
+    """Banded LSH buckets plus the stored rows used to verify candidates in one numpy call."""
+
+    def __init__(self, bands: int) -> None:
+        self.bands = bands
+        self.ids: list[str] = []
+        self._rows: np.ndarray | None = None
+        self._buckets: dict[tuple[str, int, bytes], list[int]] = defaultdict(list)
+
+    def keys(self, partition: str, signature: np.ndarray) -> list[tuple[str, int, bytes]]:
+        return [
+            (partition, band, chunk.tobytes())
+            for band, chunk in enumerate(np.array_split(signature, self.bands))
+        ]
+
+    def candidates(self, keys: Iterable[tuple[str, int, bytes]]) -> tuple[list[int], np.ndarray]:
+        positions = sorted({position for key in keys for position in self._buckets.get(key, ())})
+        if not positions:
+            return positions, np.empty(0)
+        return positions, self._rows[positions]
+
+    def add(self, keys: Iterable[tuple[str, int, bytes]], chunk_id: str, row: np.ndarray) -> None:
+        position = len(self.ids)
+        if self._rows is None:
+            self._rows = np.empty((64, len(row)), dtype=row.dtype)
+        elif position == len(self._rows):
+            self._rows = np.concatenate([self._rows, np.empty_like(self._rows)])
+        self._rows[position] = row
+        self.ids.append(chunk_id)
+        for key in keys:
+            self._buckets[key].append(position)
+
+
+@dataclass
+class DedupStats:
+    seen: int = 0
+    text_duplicates: int = 0
+    embedding_duplicates: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        dropped = self.text_duplicates + self.embedding_duplicates
+        return {
+            "chunks_seen": self.seen,
+            "duplicates_text": self.text_duplicates,
+            "duplicates_embedding": self.embedding_duplicates,
+            "dedup_ratio": round(dropped / self.seen, 4) if self.seen else 0.0,
+        }
+
+
+class ChunkDeduplicator:
+    """Collapses near-duplicate chunks into their first occurrence.
+
+    The kept chunk counts its copies under ``duplicates`` and lists their ids plus any
+    differing metadata under ``provenance``. Values of ``merge_fields`` (the filterable tag
+    fields) are unioned so metadata filters still match every source. Chunks only collapse
+    when their ``partition_fields`` agree and, with ``per_document``, when they come from the
+    same document.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        *,
+        embedding_similarity: float = 0.0,
+        per_document: bool = True,
+        merge_fields: Iterable[str] = (),
+        partition_fields: Iterable[str] = (),
+        num_perm: int = 64,
+        bands: int = 16,
+        seed: int = 1,
+    ) -> None:
+        self.threshold = threshold
+        self.embedding_similarity = embedding_similarity
+        self.per_document = per_document
+        self.merge_fields = tuple(merge_fields)
+        self.partition_fields = tuple(partition_fields)
+        self.stats = DedupStats()
+        self._minhash = MinHasher(num_perm=num_perm, seed=seed)
+        self._simhash: SimHasher | None = None
+        self._seed = seed
+        self._text_index = _LshIndex(bands)
+        self._vector_index = _LshIndex(bands)
+        self._metadata: dict[str, dict[str, Any]] = {}
+        self._stamps: dict[str, tuple[str, ...]] = {}
+        self._aliases: dict[str, str] = {}
+        self._updated: set[str] = set()
+
+    def text_duplicate(self, chunk: dict) -> bool:
+        """Merges ``chunk`` into an earlier near-identical text (True) or indexes it (False)."""
+        self.stats.seen += 1
+        stamps = prose_timestamps(chunk["text"])
+        signature = self._minhash.signature(chunk["text"])
+        keys = self._text_index.keys(self._partition(chunk), signature)
+        positions, rows = self._text_index.candidates(keys)
+        if positions:
+            match = self._best_match(
+                self._text_index,
+                positions,
+                (rows == signature).mean(axis=1),
+                self.threshold,
+                stamps,
+            )
+            if match is not None:
+                self._merge(match, chunk)
+                self.stats.text_duplicates += 1
+                INGEST_DUPLICATES.labels(stage="text").inc()
+                return True
+        self._text_index.add(keys, chunk["id"], signature)
+        self._metadata[chunk["id"]] = chunk.setdefault("metadata", {})
+        self._stamps[chunk["id"]] = stamps
+        return False
+
+    def embedding_duplicate(self, chunk: dict) -> bool:
+        """Same as ``text_duplicate`` but compares the chunk's embedding by cosine similarity."""
+        if not self.embedding_similarity:
+            return False
+        vector = np.asarray(chunk["embedding"], dtype=np.float32)
+        vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+        if self._simhash is None:
+            self._simhash = SimHasher(len(vector), seed=self._seed)
+        stamps = self._stamps.get(chunk["id"])
+        if stamps is None:
+            stamps = prose_timestamps(chunk["text"])
+        keys = self._vector_index.keys(self._partition(chunk), self._simhash.signature(vector))
+        positions, rows = self._vector_index.candidates(keys)
+        if positions:
+            match = self._best_match(
+                self._vector_index, positions, rows @ vector, self.embedding_similarity, stamps
+            )
+            if match is not None:
+                self._merge(match, chunk)
+                self.stats.embedding_duplicates += 1
+                INGEST_DUPLICATES.labels(stage="embedding").inc()
+                return True
+        self._vector_index.add(keys, chunk["id"], vector)
+        self._metadata.setdefault(chunk["id"], chunk.setdefault("metadata", {}))
+        self._stamps[chunk["id"]] = stamps
+        return False
+
+    def canonical_id(self, chunk_id: str) -> str:
+        while chunk_id in self._aliases:
+            chunk_id = self._aliases[chunk_id]
+        return chunk_id
+
+    def take_updates(self) -> dict[str, dict[str, Any]]:
+        """Metadata of kept chunks whose provenance changed since the last call."""
+        updated, self._updated = self._updated, set()
+        return {
+            chunk_id: self._metadata[chunk_id]
+            for chunk_id in updated
+            if chunk_id not in self._aliases
+        }
+
+    def _best_match(
+        self,
+        index: _LshIndex,
+        positions: list[int],
+        scores: np.ndarray,
+        threshold: float,
+        stamps: tuple[str, ...],
+    ) -> str | None:
+        for best in np.argsort(-scores):
+            if scores[best] < threshold:
+                break
+            chunk_id = index.ids[positions[best]]
+            if self._stamps.get(chunk_id) == stamps:
+                return chunk_id
+        return None
+
+    def _partition(self, chunk: dict) -> str:
+        metadata = chunk.get("metadata") or {}
+        parts = [str(metadata.get(name)) for name in self.partition_fields]
+        if self.per_document:
+            parts.append(chunk["id"].rsplit(":", 1)[0])
+        return "\x1f".join(parts)
+
+    def _merge(self, canonical_id: str, chunk: dict) -> None:
+        canonical_id = self.canonical_id(canonical_id)
+        self._aliases[chunk["id"]] = canonical_id
+        self._updated.add(canonical_id)
+        target = self._metadata[canonical_id]
+        metadata = dict(chunk.get("metadata") or {})
+        inherited = metadata.pop("provenance", [])
+        copies = metadata.pop("duplicates", 0)
+        for name in self.merge_fields:
+            if metadata.get(name) is not None:
+                target[name] = _union(target.get(name), metadata[name])
+        entry = {"id": chunk["id"]}
+        entry.update((key, value) for key, value in metadata.items() if target.get(key) != value)
+        target["duplicates"] = target.get("duplicates", 0) + copies + 1
+        target["provenance"] = (target.get("provenance", []) + [entry] + inherited)[:MAX_PROVENANCE]
+
+
+def _union(current: Any, value: Any) -> Any:
+    merged: list[Any] = []
+    for item in (current, value):
+        for element in item if isinstance(item, (list, tuple, set)) else [item]:
+            if element is not None and element not in merged:
+                merged.append(element)
+    return merged[0] if len(merged) == 1 else merged
@@ -1,31 +1,178 @@
 from __future__ import annotations
 
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from time import perf_counter
 from typing import TYPE_CHECKING, Iterable
 
+from ..instrumentation import EMBEDDING_LATENCY, EMBEDDING_LOAD_SECONDS
+
 if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
     from sentence_transformers import SentenceTransformer
 
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+class EmbeddingBackend(ABC):
+    """Encodes texts into L2-normalized vectors; ``load`` is slow and runs once per process."""
+
+    name = "base"
+
+    @abstractmethod
+    def load(self) -> None:
+        """Loads the model; called once before the first ``encode``."""
+
+    @abstractmethod
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        """Returns one vector per text."""
+
+    def encode_array(self, texts: list[str]) -> "np.ndarray":
+        import numpy as np
+
+        return np.asarray(self.encode(texts), dtype=np.float32)
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    name = "torch"
+
+    def __init__(self, model_name: str, device: str | None = None) -> None:
+        self.model_name = model_name
+        self.device = device
+        self.model: "SentenceTransformer | None" = None
+
+    def load(self) -> None:
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(self.model_name, device=self.device)
+
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        return self.encode_array(texts).tolist()
+
+    def encode_array(self, texts: list[str]) -> "np.ndarray":
+        return self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+
+class OnnxBackend(EmbeddingBackend):
+    """Mean-pooled transformer encoder exported by ``scripts/export_onnx.py``."""
+
+    name = "onnx"
+
+    def __init__(
+        self,
+        model_dir: Path,
+        *,
+        quantized: bool = True,
+        max_length: int = 256,
+        threads: int = 0,
+    ) -> None:
+        self.model_dir = Path(model_dir)
+        self.quantized = quantized
+        self.max_length = max_length
+        self.threads = threads
+        self._session = None
+        self._tokenizer = None
+        self._inputs: tuple[str, ...] = ()
+
+    @property
+    def model_path(self) -> Path:
+        return self.model_dir / (ONNX_QUANTIZED_FILE if self.quantized else ONNX_MODEL_FILE)
+
+    def load(self) -> None:
+        if not self.model_path.exists():
+            raise FileNotFoundError(f"{self.model_path} missing, run scripts/export_onnx.py first")
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        tokenizer = Tokenizer.from_file(str(self.model_dir / TOKENIZER_FILE))
+        tokenizer.enable_truncation(max_length=self.max_length)
+        tokenizer.enable_padding()
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        session = ort.InferenceSession(
+            str(self.model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self._inputs = tuple(item.name for item in session.get_inputs())
+        self._tokenizer = tokenizer
+        self._session = session
+
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        return self.encode_array(texts).tolist()
+
+    def encode_array(self, texts: list[str]) -> "np.ndarray":
+        import numpy as np
+
+        encodings = self._tokenizer.encode_batch(texts)
+        mask = np.array([item.attention_mask for item in encodings], dtype=np.int64)
+        feed = {
+            "input_ids": np.array([item.ids for item in encodings], dtype=np.int64),
+            "attention_mask": mask,
+            "token_type_ids": np.array([item.type_ids for item in encodings], dtype=np.int64),
+        }
+        hidden = self._session.run(None, {name: feed[name] for name in self._inputs})[0]
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+
+def build_backend(
+    kind: str,
+    model_name: str,
+    *,
+    onnx_path: str | Path = "models/all-MiniLM-L6-v2",
+    quantized: bool = True,
+    max_length: int = 256,
+    threads: int = 0,
+    device: str | None = None,
+) -> EmbeddingBackend:
+    if kind == "torch":
+        return SentenceTransformerBackend(model_name, device=device)
+    if kind == "onnx":
+        return OnnxBackend(
+            Path(onnx_path), quantized=quantized, max_length=max_length, threads=threads
+        )
+    raise ValueError(f"Unknown embedding backend {kind!r}")
+
 
 class EmbeddingService:
-    def __init__(self, model_name: str, device: str | None = None):
+    def __init__(
+        self,
+        model_name: str,
+        device: str | None = None,
+        backend: EmbeddingBackend | None = None,
+    ):
         self.model_name = model_name
-        self._model: "SentenceTransformer | None" = None
-        self._device = device
+        self.backend = backend or SentenceTransformerBackend(model_name, device=device)
+        self.load_seconds: float | None = None
+        self._lock = threading.Lock()
 
     @property
-    def model(self) -> "SentenceTransformer":
-        if self._model is None:
-            from sentence_transformers import SentenceTransformer
+    def ready(self) -> bool:
+        return self.load_seconds is not None
 
-            self._model = SentenceTransformer(self.model_name, device=self._device)
-        return self._model
+    def load(self) -> float:
+        with self._lock:
+            if self.load_seconds is None:
+                start = perf_counter()
+                self.backend.load()
+                self.load_seconds = perf_counter() - start
+                EMBEDDING_LOAD_SECONDS.labels(backend=self.backend.name).set(self.load_seconds)
+        return self.load_seconds
 
     def embed(self, texts: Iterable[str]) -> list[list[float]]:
         text_list = list(texts)
         if not text_list:
             return []
-        embeddings = self.model.encode(text_list, convert_to_numpy=False, normalize_embeddings=True)
-        return [list(map(float, vector)) for vector in embeddings]
+        if self.load_seconds is None:
+            self.load()
+        with EMBEDDING_LATENCY.labels(backend=self.backend.name).time():
+            return self.backend.encode(text_list)
 
     def embed_query(self, text: str) -> list[float]:
         vector = self.embed([text])
@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import queue
+import socket
+import struct
+import sys
+import threading
+from array import array
+from pathlib import Path
+from time import monotonic, sleep
+from typing import TYPE_CHECKING
+
+import structlog
+from prometheus_client import start_http_server
+
+from ..config import get_settings
+from ..instrumentation import SIDECAR_BATCH_SIZE
+from ..logging_config import configure_logging
+from .embedding import EmbeddingBackend, build_backend
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+logger = structlog.get_logger(__name__)
+
+# Little-endian frames. Request: (op, text count, body bytes), then one uint32 UTF-8 length per
+# text and the concatenated texts. Response: (status, rows, dim), then rows * dim float32 values;
+# on error ``dim`` is the byte length of the UTF-8 message that follows instead.
+HEADER = struct.Struct("<BII")
+OP_PING = 0
+OP_EMBED = 1
+STATUS_OK = 0
+STATUS_ERROR = 1
+LOADING = "loading"
+
+
+def encode_request(texts: list[str]) -> bytes:
+    encoded = [text.encode("utf-8") for text in texts]
+    lengths = struct.pack(f"<{len(encoded)}I", *map(len, encoded))
+    body = lengths + b"".join(encoded)
+    return HEADER.pack(OP_EMBED, len(encoded), len(body)) + body
+
+
+def decode_texts(body: bytes, count: int) -> list[str]:
+    lengths = struct.unpack_from(f"<{count}I", body)
+    texts = []
+    offset = 4 * count
+    for length in lengths:
+        texts.append(body[offset : offset + length].decode("utf-8"))
+        offset += length
+    return texts
+
+
+def encode_vectors(vectors: "np.ndarray") -> bytes:
+    rows, dim = vectors.shape
+    return HEADER.pack(STATUS_OK, rows, dim) + vectors.astype("<f4", copy=False).tobytes()
+
+
+def decode_vectors(body: bytes, rows: int, dim: int) -> list[list[float]]:
+    values = array("f")
+    values.frombytes(body)
+    if sys.byteorder == "big":  # pragma: no cover
+        values.byteswap()
+    return [values[row * dim : (row + 1) * dim].tolist() for row in range(rows)]
+
+
+def encode_error(message: str) -> bytes:
+    encoded = message.encode("utf-8")
+    return HEADER.pack(STATUS_ERROR, 0, len(encoded)) + encoded
+
+
+class SidecarBackend(EmbeddingBackend):
+    """Client for the embedding sidecar; falls back to an in-process backend if it is down.
+
+    ``load`` waits up to ``startup_timeout`` for the sidecar to finish loading its model and loads
+    the fallback if it never does. A failed connection in ``encode`` switches to the fallback for
+    ``retry_seconds`` at a time; a slow sidecar only raises ``TimeoutError``.
+    """
+
+    name = "sidecar"
+
+    def __init__(
+        self,
+        socket_path: str | Path,
+        fallback: EmbeddingBackend,
+        *,
+        timeout: float = 30.0,
+        retry_seconds: float = 30.0,
+        startup_timeout: float = 120.0,
+    ) -> None:
+        self.socket_path = str(socket_path)
+        self.fallback = fallback
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self.startup_timeout = startup_timeout
+        self._pool: queue.LifoQueue[socket.socket] = queue.LifoQueue()
+        self._fallback_lock = threading.Lock()
+        self._fallback_loaded = False
+        self._unavailable_until = 0.0
+
+    @property
+    def using_fallback(self) -> bool:
+        return monotonic() < self._unavailable_until
+
+    def load(self) -> None:
+        deadline = monotonic() + self.startup_timeout
+        delay = 0.05
+        while True:
+            try:
+                self._request(HEADER.pack(OP_PING, 0, 0))
+                return
+            except (OSError, RuntimeError) as exc:
+                if monotonic() + delay > deadline:
+                    logger.warning(
+                        "embedding_sidecar_not_ready", socket=self.socket_path, error=str(exc)
+                    )
+                    self._mark_unavailable(exc)
+                    self._load_fallback()
+                    return
+            sleep(delay)
+            delay = min(delay * 2, 2.0)
+
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        if not self.using_fallback:
+            try:
+                rows, dim, body = self._request(encode_request(texts))
+                return decode_vectors(body, rows, dim)
+            except TimeoutError as exc:
+                # The sidecar is up but busy; loading a second model here would only add load.
+                raise TimeoutError(
+                    f"Embedding sidecar did not answer within {self.timeout}s"
+                ) from exc
+            except OSError as exc:
+                self._mark_unavailable(exc)
+        self._load_fallback()
+        return self.fallback.encode(texts)
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    def _request(self, frame: bytes) -> tuple[int, int, bytes]:
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.settimeout(self.timeout)
+            try:
+                conn.connect(self.socket_path)
+            except OSError:
+                conn.close()
+                raise
+        try:
+            conn.sendall(frame)
+            status, rows, dim = HEADER.unpack(_recv_exactly(conn, HEADER.size))
+            size = dim if status == STATUS_ERROR else rows * dim * 4
+            body = _recv_exactly(conn, size)
+        except OSError:
+            conn.close()
+            raise
+        self._pool.put(conn)
+        if status == STATUS_ERROR:
+            raise RuntimeError(f"Embedding sidecar failed: {body.decode('utf-8')}")
+        return rows, dim, body
+
+    def _mark_unavailable(self, exc: Exception) -> None:
+        self.close()
+        self._unavailable_until = monotonic() + self.retry_seconds
+        logger.warning(
+            "embedding_sidecar_unavailable",
+            socket=self.socket_path,
+            error=str(exc),
+            retry_seconds=self.retry_seconds,
+        )
+
+    def _load_fallback(self) -> None:
+        with self._fallback_lock:
+            if not self._fallback_loaded:
+                self.fallback.load()
+                self._fallback_loaded = True
+
+
+def _recv_exactly(conn: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        read = conn.recv_into(view[received:])
+        if not read:
+            raise ConnectionResetError("Embedding sidecar closed the connection")
+        received += read
+    return bytes(buffer)
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent requests from all connections into shared model calls."""
+
+    def __init__(
+        self, backend: EmbeddingBackend, max_batch: int = 64, max_wait_ms: float = 2.0
+    ) -> None:
+        self.backend = backend
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: asyncio.Queue[tuple[list[str], asyncio.Future]] = asyncio.Queue()
+
+    async def submit(self, texts: list[str]) -> "np.ndarray":
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, future))
+        return await future
+
+    async def run(self) -> None:
+        while True:
+            pending = [await self._queue.get()]
+            total = self._drain(pending, len(pending[0][0]))
+            if total < self.max_batch and self.max_wait > 0:
+                await asyncio.sleep(self.max_wait)
+                total = self._drain(pending, total)
+            await self._dispatch(pending, total)
+
+    def _drain(self, pending: list[tuple[list[str], asyncio.Future]], total: int) -> int:
+        while total < self.max_batch and not self._queue.empty():
+            item = self._queue.get_nowait()
+            pending.append(item)
+            total += len(item[0])
+        return total
+
+    async def _dispatch(self, pending: list[tuple[list[str], asyncio.Future]], total: int) -> None:
+        texts = [text for batch, _ in pending for text in batch]
+        SIDECAR_BATCH_SIZE.observe(total)
+        try:
+            vectors = await asyncio.to_thread(self.backend.encode_array, texts)
+        except Exception as exc:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        offset = 0
+        for batch, future in pending:
+            if not future.done():
+                future.set_result(vectors[offset : offset + len(batch)])
+            offset += len(batch)
+
+
+async def _handle(
+    batcher: EmbeddingBatcher,
+    loaded: asyncio.Event,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+) -> None:
+    try:
+        while True:
+            op, count, size = HEADER.unpack(await reader.readexactly(HEADER.size))
+            body = await reader.readexactly(size)
+            if op == OP_PING:
+                writer.write(
+                    HEADER.pack(STATUS_OK, 0, 0) if loaded.is_set() else encode_error(LOADING)
+                )
+            elif op == OP_EMBED:
+                try:
+                    vectors = await batcher.submit(decode_texts(body, count))
+                except Exception as exc:
+                    writer.write(encode_error(str(exc)))
+                else:
+                    writer.write(encode_vectors(vectors))
+            else:
+                writer.write(encode_error(f"unknown op {op}"))
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(
+    socket_path: str | Path,
+    backend: EmbeddingBackend,
+    *,
+    max_batch: int = 64,
+    max_wait_ms: float = 2.0,
+    ready: asyncio.Event | None = None,
+) -> None:
+    """Binds the socket before loading the model so clients can wait instead of falling back.
+
+    Pings answer ``loading`` until the model is ready; embed requests queue until then.
+    """
+    socket_path = Path(socket_path)
+    batcher = EmbeddingBatcher(backend, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    loaded = asyncio.Event()
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    socket_path.unlink(missing_ok=True)
+    server = await asyncio.start_unix_server(
+        lambda reader, writer: _handle(batcher, loaded, reader, writer), path=str(socket_path)
+    )
+    os.chmod(socket_path, 0o660)
+    logger.info("embedding_sidecar_listening", socket=str(socket_path), backend=backend.name)
+    worker = None
+    try:
+        async with server:
+            await asyncio.to_thread(backend.load)
+            worker = asyncio.create_task(batcher.run())
+            loaded.set()
+            logger.info("embedding_sidecar_ready", backend=backend.name)
+            if ready is not None:
+                ready.set()
+            await server.serve_forever()
+    finally:
+        if worker is not None:
+            worker.cancel()
+        socket_path.unlink(missing_ok=True)
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Shared embedding server for uvicorn workers")
+    parser.add_argument("--socket", default=settings.embedding_socket or "/tmp/rag-embed.sock")
+    parser.add_argument("--max-batch", type=int, default=settings.embedding_sidecar_max_batch)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.embedding_sidecar_wait_ms)
+    parser.add_argument("--metrics-port", type=int, default=0)
+    args = parser.parse_args()
+
+    configure_logging(settings.log_level)
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+    backend = build_backend(
+        settings.embedding_backend,
+        settings.embedding_model,
+        onnx_path=settings.embedding_onnx_path,
+        quantized=settings.embedding_onnx_quantized,
+        max_length=settings.embedding_max_length,
+        threads=settings.embedding_threads,
+    )
+    asyncio.run(serve(args.socket, backend, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass
-from typing import Iterable
+import string
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
 
 
 PROMPT_INJECTION_REGEX = re.compile(
@@ -10,10 +12,26 @@ PROMPT_INJECTION_REGEX = re.compile(
     re.IGNORECASE,
 )
 
-PII_REGEXES = [
-    re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.IGNORECASE),
-    re.compile(r"\+?[0-9][0-9\- ]{8,}")
-]
+PII_PATTERNS = {
+    "email": r"(?i:[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,})",
+    "iban": r"\b[A-Z]{2}[0-9]{2}(?: ?[A-Z0-9]){11,30}\b",
+    "phone": r"\+?[0-9][0-9\- ]{8,}",
+    "license_plate": r"\b[A-ZÄÖÜ]{1,3}-[A-Z]{1,2} ?[0-9]{1,4}[EH]?\b",
+}
+
+PII_REGEX = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in PII_PATTERNS.items()))
+
+# Every PII match contains an "@" or a digit that is followed or preceded by enough context
+# for one of the rules. This anchor regex starts with a character class, so the regex engine
+# skips ahead in C; the full alternation is only tried at the few positions in front of a
+# viable anchor (plate prefix: at most seven characters, or an email local part).
+PII_ANCHOR_REGEX = re.compile(
+    r"[0-9@](?:(?<=@)|(?<=[0-9])(?:[0-9\- ]{8}|[0-9](?: ?[A-Z0-9]){11}"
+    r"|(?:(?<=[A-Z][0-9])|(?<=[A-Z] [0-9]))[0-9]{0,3}[EH]?\b))"
+)
+PII_MAX_PREFIX = 7
+PII_SCAN_REGEX = re.compile(f"{PII_REGEX.pattern}|(?=[0-9@])")
+EMAIL_LOCAL_CHARS = frozenset(string.ascii_letters + string.digits + "._%+-")
 
 
 @dataclass
@@ -22,9 +40,68 @@ class GuardResult:
     reasons: list[str]
 
 
+@dataclass
+class RedactionResult:
+    text: str
+    rules: dict[str, int] = field(default_factory=dict)
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher; one pass over the text regardless of pattern count."""
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[str, ...]] = [()]
+        for pattern in patterns:
+            if pattern:
+                self._insert(pattern)
+        self._link()
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, str]]:
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for idx, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern in out[state]:
+                yield idx - len(pattern) + 1, pattern
+
+    def search(self, text: str) -> str | None:
+        return next((pattern for _, pattern in self.iter_matches(text)), None)
+
+    def _insert(self, pattern: str) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = next_state
+        if pattern not in self._out[state]:
+            self._out[state] = self._out[state] + (pattern,)
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+
 class PromptGuard:
     def __init__(self, blocklist: Iterable[str]):
         self.blocklist = tuple(blocklist)
+        self._matcher = AhoCorasick(term.lower() for term in self.blocklist)
 
     def check(self, text: str, level: str = "standard") -> GuardResult:
         lowered = text.lower()
@@ -32,7 +109,7 @@ class PromptGuard:
         if level != "disabled":
             if PROMPT_INJECTION_REGEX.search(lowered):
                 reasons.append("prompt_injection_regex")
-            if any(term in lowered for term in self.blocklist):
+            if self._matcher.search(lowered) is not None:
                 reasons.append("blocklisted_phrase")
         allowed = level == "disabled" or not reasons
         return GuardResult(allowed=allowed, reasons=reasons)
@@ -43,7 +120,27 @@ class PIIRedactor:
         self.mask_token = mask_token
 
     def redact(self, text: str) -> str:
-        redacted = text
-        for pattern in PII_REGEXES:
-            redacted = pattern.sub(self.mask_token, redacted)
-        return redacted
+        return self.redact_with_report(text).text
+
+    def redact_with_report(self, text: str) -> RedactionResult:
+        rules: dict[str, int] = {}
+        parts: list[str] = []
+        last = pos = 0
+        while (anchor := PII_ANCHOR_REGEX.search(text, pos)) is not None:
+            end = anchor.start()
+            start = end
+            while start > pos and text[start - 1] in EMAIL_LOCAL_CHARS:
+                start -= 1
+            match = PII_SCAN_REGEX.search(text, max(pos, min(start, end - PII_MAX_PREFIX)))
+            while match is not None and match.lastgroup is None and match.start() < end:
+                match = PII_SCAN_REGEX.search(text, match.start() + 1)
+            if match is None or match.lastgroup is None:
+                pos = end + 1
+                continue
+            rule = match.lastgroup or "unknown"
+            rules[rule] = rules.get(rule, 0) + 1
+            parts.append(text[last : match.start()])
+            parts.append(self.mask_token)
+            last = pos = match.end()
+        parts.append(text[last:])
+        return RedactionResult(text="".join(parts), rules=rules)
@@ -1,22 +1,182 @@
 from __future__ import annotations
 
 import csv
+import multiprocessing
+import os
+import threading
 import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Iterable
+from time import perf_counter
+from typing import Any, Callable, Iterable, Iterator
 
+import structlog
 from pypdf import PdfReader
 
+from ..instrumentation import INGEST_BYTES, INGEST_PAGES
 from ..schemas import IngestDocument
+from .chunking import Chunker, Splitter, iter_lines
+from .dedup import ChunkDeduplicator
+from .embedding import EmbeddingService
+from .vector_store import RedisVectorStore
+
+__all__ = [
+    "BatchWriter",
+    "Chunker",
+    "DocumentParser",
+    "IngestionService",
+    "ParseProgress",
+    "ThroughputTracker",
+]
+
+logger = structlog.get_logger(__name__)
+
+MIME_KINDS = {
+    "text/markdown": "markdown",
+    ".md": "markdown",
+    "md": "markdown",
+    "text/csv": "csv",
+    ".csv": "csv",
+    "csv": "csv",
+    "application/pdf": "pdf",
+    ".pdf": "pdf",
+    "pdf": "pdf",
+}
+
+
+@dataclass
+class ParseProgress:
+    source: str
+    bytes_read: int = 0
+    total_bytes: int = 0
+    pages_done: int = 0
+    total_pages: int = 0
+
+
+ProgressCallback = Callable[[ParseProgress], None]
+
+
+class ThroughputTracker:
+    """Progress callback that aggregates parser progress into metrics and periodic logs."""
+
+    def __init__(self, log_interval: float = 5.0) -> None:
+        self.log_interval = log_interval
+        self.started = perf_counter()
+        self.bytes_read = 0
+        self.pages = 0
+        self._seen: dict[str, tuple[int, int]] = {}
+        self._last_log = self.started
+
+    def __call__(self, progress: ParseProgress) -> None:
+        seen_bytes, seen_pages = self._seen.get(progress.source, (0, 0))
+        delta_bytes = progress.bytes_read - seen_bytes
+        delta_pages = progress.pages_done - seen_pages
+        self._seen[progress.source] = (progress.bytes_read, progress.pages_done)
+        self.bytes_read += delta_bytes
+        self.pages += delta_pages
+        INGEST_BYTES.inc(delta_bytes)
+        INGEST_PAGES.inc(delta_pages)
+        now = perf_counter()
+        if now - self._last_log >= self.log_interval:
+            self._last_log = now
+            logger.info(
+                "ingest_progress",
+                source=progress.source,
+                bytes_read=progress.bytes_read,
+                total_bytes=progress.total_bytes,
+                pages_done=progress.pages_done,
+                total_pages=progress.total_pages,
+                **self.snapshot(),
+            )
+
+    def snapshot(self) -> dict[str, Any]:
+        elapsed = max(perf_counter() - self.started, 1e-9)
+        return {
+            "bytes_read": self.bytes_read,
+            "pages": self.pages,
+            "seconds": round(elapsed, 3),
+            "mb_per_second": round(self.bytes_read / elapsed / 1_000_000, 3),
+        }
+
+
+# One open reader per pool worker (or parser thread), reused across the page ranges of a file
+# and dropped with its last page, so memory stays bounded by a single document.
+_open_pdf = threading.local()
+
+
+def _extract_pages(path: str, start: int, end: int) -> list[str]:
+    key = (path, os.stat(path).st_mtime_ns)
+    if getattr(_open_pdf, "key", None) != key:
+        _close_pdf()
+        # A file handle instead of the path keeps pypdf from copying the file into memory.
+        handle = open(path, "rb")
+        try:
+            reader = PdfReader(handle)
+        except Exception:
+            handle.close()
+            raise
+        _open_pdf.key, _open_pdf.handle, _open_pdf.reader = key, handle, reader
+    reader = _open_pdf.reader
+    try:
+        return [reader.pages[idx].extract_text() or "" for idx in range(start, end)]
+    finally:
+        if end >= len(reader.pages):
+            _close_pdf()
+
+
+def _close_pdf() -> None:
+    handle = getattr(_open_pdf, "handle", None)
+    if handle is not None:
+        handle.close()
+    _open_pdf.key = _open_pdf.handle = _open_pdf.reader = None
+
+
+def _count_pages(path: Path) -> int:
+    with path.open("rb") as handle:
+        return len(PdfReader(handle).pages)
 
 
 class DocumentParser:
-    def __init__(self, base_path: Path | None = None):
+    def __init__(
+        self,
+        base_path: Path | None = None,
+        *,
+        pdf_workers: int = 0,
+        pdf_pages_per_task: int = 8,
+        csv_batch_rows: int = 500,
+        text_block_bytes: int = 1 << 16,
+    ):
         self.base_path = (base_path or Path.cwd()).resolve()
+        self.pdf_workers = pdf_workers
+        self.pdf_pages_per_task = pdf_pages_per_task
+        self.csv_batch_rows = csv_batch_rows
+        self.text_block_bytes = text_block_bytes
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
 
     def load(self, doc: IngestDocument) -> str:
+        return "\n".join(self.iter_text(doc))
+
+    def iter_text(
+        self, doc: IngestDocument, progress: ProgressCallback | None = None
+    ) -> Iterator[str]:
         if doc.text:
-            return doc.text
+            yield doc.text
+            return
+        file_path = self.resolve(doc)
+        kind = self.kind(doc)
+        if kind == "csv":
+            yield from self._iter_csv(file_path, progress)
+        elif kind == "pdf":
+            yield from self._iter_pdf(file_path, progress)
+        else:
+            yield from self._iter_text_file(file_path, progress)
+
+    def resolve(self, doc: IngestDocument) -> Path:
         if not doc.path:
             raise ValueError("Document missing both text and path")
 
@@ -31,63 +191,229 @@ class DocumentParser:
         file_path = file_path.resolve()
         if not file_path.exists():
             raise FileNotFoundError(file_path)
-        mime = doc.mime_type or file_path.suffix.lower()
-        if mime in {"text/markdown", ".md", "md"}:
-            return file_path.read_text(encoding="utf-8")
-        if mime in {"text/csv", ".csv", "csv"}:
-            return self._read_csv(file_path)
-        if mime in {"application/pdf", ".pdf", "pdf"}:
-            return self._read_pdf(file_path)
-        return file_path.read_text(encoding="utf-8")
-
-    def _read_csv(self, path: Path) -> str:
+        return file_path
+
+    def kind(self, doc: IngestDocument) -> str:
+        mime = doc.mime_type or (Path(doc.path).suffix.lower() if doc.path else "")
+        return MIME_KINDS.get(mime, "text")
+
+    def close(self) -> None:
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    def _iter_text_file(self, path: Path, progress: ProgressCallback | None) -> Iterator[str]:
+        state = ParseProgress(source=str(path), total_bytes=path.stat().st_size)
+        block: list[str] = []
+        block_bytes = 0
+        with path.open("rb") as handle:
+            for raw in handle:
+                block.append(raw.decode("utf-8").replace("\r\n", "\n"))
+                block_bytes += len(raw)
+                if block_bytes >= self.text_block_bytes:
+                    state.bytes_read += block_bytes
+                    yield "".join(block).removesuffix("\n")
+                    self._report(progress, state)
+                    block, block_bytes = [], 0
+        if block:
+            state.bytes_read += block_bytes
+            yield "".join(block).removesuffix("\n")
+            self._report(progress, state)
+
+    def _iter_csv(self, path: Path, progress: ProgressCallback | None) -> Iterator[str]:
+        state = ParseProgress(source=str(path), total_bytes=path.stat().st_size)
+
+        def decoded(handle) -> Iterator[str]:
+            for raw in handle:
+                state.bytes_read += len(raw)
+                yield raw.decode("utf-8")
+
         rows: list[str] = []
-        with path.open("r", encoding="utf-8") as handle:
-            reader = csv.DictReader(handle)
+        with path.open("rb") as handle:
+            reader = csv.DictReader(decoded(handle))
             for row in reader:
                 rows.append(", ".join(f"{k}={v}" for k, v in row.items()))
-        return "\n".join(rows)
-
-    def _read_pdf(self, path: Path) -> str:
-        reader = PdfReader(str(path))
-        pages = [page.extract_text() or "" for page in reader.pages]
-        return "\n".join(pages)
-
-
-class Chunker:
-    def __init__(self, chunk_size: int = 600, overlap: int = 80) -> None:
-        self.chunk_size = chunk_size
-        self.overlap = overlap
-
-    def split(self, text: str) -> list[str]:
-        chunks: list[str] = []
-        start = 0
-        length = len(text)
-        while start < length:
-            end = min(length, start + self.chunk_size)
-            chunks.append(text[start:end])
-            if end == length:
-                break
-            start = max(0, end - self.overlap)
-        return [chunk.strip() for chunk in chunks if chunk.strip()]
+                if len(rows) >= self.csv_batch_rows:
+                    yield "\n".join(rows)
+                    self._report(progress, state)
+                    rows = []
+        if rows:
+            yield "\n".join(rows)
+            self._report(progress, state)
+
+    def _iter_pdf(self, path: Path, progress: ProgressCallback | None) -> Iterator[str]:
+        total_pages = _count_pages(path)
+        state = ParseProgress(
+            source=str(path), total_bytes=path.stat().st_size, total_pages=total_pages
+        )
+        ranges = [
+            (start, min(start + self.pdf_pages_per_task, total_pages))
+            for start in range(0, total_pages, self.pdf_pages_per_task)
+        ]
+        for pages in self._extract_ranges(str(path), ranges):
+            for text in pages:
+                state.pages_done += 1
+                state.bytes_read = state.total_bytes * state.pages_done // max(total_pages, 1)
+                yield text
+                self._report(progress, state)
+
+    def _extract_ranges(self, path: str, ranges: list[tuple[int, int]]) -> Iterator[list[str]]:
+        if self.pdf_workers == 1 or len(ranges) <= 1:
+            for start, end in ranges:
+                yield _extract_pages(path, start, end)
+            return
+        pool = self._executor()
+        window = 2 * (self.pdf_workers or os.cpu_count() or 1)
+        pending = iter(ranges)
+        in_flight: deque[Future[list[str]]] = deque(
+            pool.submit(_extract_pages, path, start, end) for start, end in islice(pending, window)
+        )
+        try:
+            while in_flight:
+                pages = in_flight.popleft().result()
+                next_range = next(pending, None)
+                if next_range is not None:
+                    in_flight.append(pool.submit(_extract_pages, path, *next_range))
+                yield pages
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # Concurrent /ingest requests run in the threadpool; only one of them may create the pool.
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.pdf_workers or None,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _report(self, progress: ProgressCallback | None, state: ParseProgress) -> None:
+        if progress is not None:
+            progress(state)
 
 
 class IngestionService:
-    def __init__(self, parser: DocumentParser, chunker: Chunker):
+    def __init__(
+        self,
+        parser: DocumentParser,
+        chunker: Splitter,
+        splitters: dict[str, Splitter] | None = None,
+    ):
         self.parser = parser
         self.chunker = chunker
+        self.splitters = splitters or {}
 
     def prepare(self, doc: IngestDocument) -> list[dict]:
-        text = self.parser.load(doc)
+        return list(self.iter_prepare(doc))
+
+    def iter_prepare(
+        self, doc: IngestDocument, progress: ProgressCallback | None = None
+    ) -> Iterator[dict]:
         doc_id = doc.id or str(uuid.uuid4())
-        chunks = self.chunker.split(text)
-        payloads = []
-        for idx, chunk in enumerate(chunks):
-            payloads.append(
-                {
-                    "id": f"{doc_id}:{idx}",
-                    "text": chunk,
-                    "metadata": doc.metadata or {},
-                }
-            )
-        return payloads
+        splitter = self.splitters.get(self.parser.kind(doc), self.chunker)
+        lines = (
+            line for block in self.parser.iter_text(doc, progress) for line in iter_lines(block)
+        )
+        for idx, chunk in enumerate(splitter.chunks(lines)):
+            yield {
+                "id": f"{doc_id}:{idx}",
+                "text": chunk.text,
+                "metadata": {**(doc.metadata or {}), **chunk.metadata},
+            }
+
+
+class ChunkSourceError(RuntimeError):
+    """Raised by BatchWriter.write when the chunk iterator fails, e.g. on a corrupt file."""
+
+
+class BatchWriter:
+    """Embeds and upserts prepared chunks in fixed-size batches across documents."""
+
+    def __init__(
+        self,
+        embedding: EmbeddingService,
+        vector_store: RedisVectorStore,
+        namespace: str,
+        batch_size: int = 256,
+        dedup: ChunkDeduplicator | None = None,
+    ) -> None:
+        self.embedding = embedding
+        self.vector_store = vector_store
+        self.namespace = namespace
+        self.batch_size = batch_size
+        self.dedup = dedup
+        self.count = 0
+        self._batch: list[dict] = []
+        self._dropped: list[str] = []
+        self._after_flush: list[Callable[[], None]] = []
+
+    def write(self, chunks: Iterable[dict], on_stored: Callable[[int], None] | None = None) -> int:
+        written = 0
+        # This call's entries still pending in _batch / _dropped; a flush hands them off.
+        batched = dropped = 0
+        iterator = iter(chunks)
+        while True:
+            try:
+                chunk = next(iterator, None)
+            except Exception as exc:
+                # Unreadable source: keep nothing of it that has not been flushed yet.
+                del self._batch[len(self._batch) - batched :]
+                del self._dropped[len(self._dropped) - dropped :]
+                raise ChunkSourceError(str(exc) or type(exc).__name__) from exc
+            if chunk is None:
+                break
+            written += 1
+            if self.dedup is not None and self.dedup.text_duplicate(chunk):
+                self._dropped.append(chunk["id"])
+                dropped += 1
+                continue
+            self._batch.append(chunk)
+            batched += 1
+            if len(self._batch) >= self.batch_size:
+                self.flush()
+                batched = dropped = 0
+        if on_stored is not None:
+            self._after_flush.append(partial(on_stored, written))
+            if not self._batch:
+                self.flush()
+        return written
+
+    def flush(self) -> None:
+        stored: set[str] = set()
+        if self._batch:
+            embeddings = self.embedding.embed([chunk["text"] for chunk in self._batch])
+            for chunk, vector in zip(self._batch, embeddings):
+                chunk["embedding"] = vector
+            if self.dedup is not None:
+                for chunk in self._batch:
+                    if self.dedup.embedding_duplicate(chunk):
+                        self._dropped.append(chunk["id"])
+                    else:
+                        stored.add(chunk["id"])
+                self._batch = [chunk for chunk in self._batch if chunk["id"] in stored]
+            if self._batch:
+                self.count += self.vector_store.upsert(
+                    namespace=self.namespace, documents=self._batch
+                )
+            self._batch = []
+        if self.dedup is not None:
+            self._store_provenance(stored)
+        callbacks, self._after_flush = self._after_flush, []
+        for callback in callbacks:
+            callback()
+
+    def _store_provenance(self, stored: set[str]) -> None:
+        # Kept chunks from earlier batches gained copies; dropped ids may exist from older runs.
+        updates = {
+            chunk_id: metadata
+            for chunk_id, metadata in self.dedup.take_updates().items()
+            if chunk_id not in stored
+        }
+        if updates:
+            self.vector_store.update_metadata(updates)
+        if self._dropped:
+            self.vector_store.delete_ids(self._dropped)
+            self._dropped = []
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import redis
+
+SUPPORTED_SUFFIXES = frozenset({".md", ".csv", ".pdf", ".txt"})
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    mtime_ns: int
+    size: int
+    sha256: str = ""
+    chunks: int = 0
+
+    def encode(self) -> bytes:
+        return json.dumps([self.mtime_ns, self.size, self.sha256, self.chunks]).encode("utf-8")
+
+    @classmethod
+    def decode(cls, raw: bytes | str) -> "FileFingerprint":
+        mtime_ns, size, sha256, chunks = json.loads(raw)
+        return cls(mtime_ns=mtime_ns, size=size, sha256=sha256, chunks=chunks)
+
+
+@dataclass
+class ScannedFile:
+    path: Path
+    relative: str
+    fingerprint: FileFingerprint
+    previous: FileFingerprint | None = None
+
+
+@dataclass
+class ScanResult:
+    changed: list[ScannedFile]
+    touched: list[ScannedFile]
+    total: int
+    removed: dict[str, FileFingerprint] = field(default_factory=dict)
+
+    @property
+    def unchanged(self) -> int:
+        return self.total - len(self.changed)
+
+
+class FileManifest:
+    """(mtime, size, sha256) per ingested file, stored as one Redis hash per namespace."""
+
+    def __init__(self, client: redis.Redis, prefix: str = "manifest") -> None:
+        self.client = client
+        self.prefix = prefix
+
+    def load(self, namespace: str) -> dict[str, FileFingerprint]:
+        raw = self.client.hgetall(self._key(namespace))
+        return {
+            (field.decode("utf-8") if isinstance(field, bytes) else field): FileFingerprint.decode(
+                value
+            )
+            for field, value in raw.items()
+        }
+
+    def record(self, namespace: str, entries: dict[str, FileFingerprint]) -> None:
+        if entries:
+            self.client.hset(
+                self._key(namespace),
+                mapping={path: fingerprint.encode() for path, fingerprint in entries.items()},
+            )
+
+    def forget(self, namespace: str, paths: list[str]) -> None:
+        if paths:
+            self.client.hdel(self._key(namespace), *paths)
+
+    def _key(self, namespace: str) -> str:
+        return f"{self.prefix}:{namespace}"
+
+
+class SourceScanner:
+    """Expands directories and globs under ``base_path`` and filters out unchanged files."""
+
+    def __init__(self, base_path: Path, max_workers: int = 16) -> None:
+        self.base_path = base_path.resolve()
+        self.max_workers = max_workers
+
+    def scan(
+        self,
+        pattern: str,
+        known: dict[str, FileFingerprint],
+        *,
+        recursive: bool = True,
+        force: bool = False,
+    ) -> ScanResult:
+        """Touched files changed mtime or size but not content; they only need a manifest update.
+
+        Removed files are manifest entries below the pattern's directory that no longer exist.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            candidates = []
+            files = self._expand(pattern, recursive, pool)
+            seen: set[str] = set()
+            for path, mtime_ns, size in files:
+                relative = path.relative_to(self.base_path).as_posix()
+                if relative in seen:  # a symlink to a file that is scanned anyway
+                    continue
+                seen.add(relative)
+                previous = known.get(relative)
+                if (
+                    not force
+                    and previous is not None
+                    and (previous.mtime_ns, previous.size) == (mtime_ns, size)
+                ):
+                    continue
+                candidates.append((path, relative, mtime_ns, size, previous))
+            digests = pool.map(lambda item: _sha256(item[0]), candidates)
+            changed: list[ScannedFile] = []
+            touched: list[ScannedFile] = []
+            for (path, relative, mtime_ns, size, previous), digest in zip(candidates, digests):
+                chunks = previous.chunks if previous is not None else 0
+                scanned = ScannedFile(
+                    path=path,
+                    relative=relative,
+                    fingerprint=FileFingerprint(mtime_ns, size, digest, chunks),
+                    previous=previous,
+                )
+                if not force and previous is not None and previous.sha256 == digest:
+                    touched.append(scanned)
+                else:
+                    changed.append(scanned)
+        removed = {
+            relative: fingerprint
+            for relative, fingerprint in known.items()
+            if relative not in seen
+            and self._in_scope(relative, pattern, recursive)
+            and not (self.base_path / relative).is_file()
+        }
+        return ScanResult(changed=changed, touched=touched, total=len(files), removed=removed)
+
+    def _expand(
+        self, pattern: str, recursive: bool, pool: ThreadPoolExecutor
+    ) -> list[tuple[Path, int, int]]:
+        target = self._within_base(pattern)
+        if target.is_dir():
+            return self._walk(target, recursive, pool)
+        if not _is_glob(pattern):
+            raise FileNotFoundError(target)
+        if not recursive and "**" in pattern:
+            raise ValueError(f"Pattern {pattern!r} uses '**' but recursive is false")
+        files = []
+        for path in self.base_path.glob(self._relative_pattern(pattern)):
+            resolved = path.resolve()
+            if (
+                resolved.suffix.lower() in SUPPORTED_SUFFIXES
+                and self._inside(resolved)
+                and resolved.is_file()
+            ):
+                stat = resolved.stat()
+                files.append((resolved, stat.st_mtime_ns, stat.st_size))
+        return files
+
+    def _walk(
+        self, root: Path, recursive: bool, pool: ThreadPoolExecutor
+    ) -> list[tuple[Path, int, int]]:
+        files: list[tuple[Path, int, int]] = []
+        pending: set[Future] = {pool.submit(_scan_dir, root, self.base_path)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                subdirs, entries = future.result()
+                files.extend(entries)
+                if recursive:
+                    pending |= {
+                        pool.submit(_scan_dir, subdir, self.base_path) for subdir in subdirs
+                    }
+        return files
+
+    def _in_scope(self, relative: str, pattern: str, recursive: bool) -> bool:
+        """Whether ``relative`` lies in the directory a scan of ``pattern`` covers."""
+        root = Path(self._relative_pattern(pattern))
+        if _is_glob(pattern):
+            literal = []
+            for part in root.parts:
+                if _is_glob(part):
+                    break
+                literal.append(part)
+            root = Path(*literal) if literal else Path(".")
+        path = Path(relative)
+        if root != Path(".") and root not in path.parents:
+            return False
+        return recursive or _is_glob(pattern) or path.parent == root
+
+    def _relative_pattern(self, pattern: str) -> str:
+        provided = Path(pattern)
+        if provided.is_absolute():
+            return str(provided.relative_to(self.base_path))
+        parts = provided.parts
+        if parts and parts[0] == self.base_path.name:
+            parts = parts[1:]
+        return str(Path(*parts)) if parts else "."
+
+    def _within_base(self, pattern: str) -> Path:
+        provided = Path(pattern)
+        if not provided.is_absolute():
+            provided = self.base_path / self._relative_pattern(pattern)
+        resolved = provided.resolve()
+        if not self._inside(resolved):
+            raise ValueError(f"Source {pattern!r} is outside of the data path")
+        return resolved
+
+    def _inside(self, path: Path) -> bool:
+        return _contained(path, self.base_path)
+
+
+def _is_glob(pattern: str) -> bool:
+    return any(char in pattern for char in "*?[")
+
+
+def _scan_dir(directory: Path, base: Path) -> tuple[list[Path], list[tuple[Path, int, int]]]:
+    subdirs: list[Path] = []
+    files: list[tuple[Path, int, int]] = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(Path(entry.path))
+                continue
+            if Path(entry.name).suffix.lower() not in SUPPORTED_SUFFIXES:
+                continue
+            path = Path(entry.path)
+            if entry.is_symlink():
+                # Same containment rule as globbed paths: links may not escape the data path.
+                path = path.resolve()
+                if not _contained(path, base) or not path.is_file():
+                    continue
+                stat = path.stat()
+            elif entry.is_file(follow_symlinks=False):
+                stat = entry.stat(follow_symlinks=False)
+            else:
+                continue
+            files.append((path, stat.st_mtime_ns, stat.st_size))
+    return subdirs, files
+
+
+def _contained(path: Path, base: Path) -> bool:
+    return path == base or base in path.parents
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -1,20 +1,30 @@
 from __future__ import annotations
 
+import asyncio
 import structlog
+from contextlib import nullcontext
+from functools import partial
 from time import perf_counter
-from typing import Any
+from typing import Any, AsyncIterator
 
 from ..instrumentation import (
     LLM_LATENCY,
     MODEL_USAGE_COUNTER,
+    PII_REDACTION_COUNTER,
     PROMPT_GUARD_COUNTER,
+    RELEVANCE_CHUNKS_DROPPED,
+    RELEVANCE_GATE_COUNTER,
     REQUEST_COUNTER,
+    RETRIEVAL_BEST_SIMILARITY,
     RETRIEVAL_LATENCY,
 )
 from ..schemas import ChatRequest, ChatResponse, SourceChunk
 from .embedding import EmbeddingService
-from .guards import PIIRedactor, PromptGuard
+from .guards import GuardResult, PIIRedactor, PromptGuard
 from .ollama import OllamaClient
+from .relevance import GateDecision, RelevanceGate
+from .scheduler import BATCH, INTERACTIVE, PrioritySlots
+from .sessions import HistorySummarizer, SessionHistory, SessionStore, SessionTurn
 from .vector_store import RedisVectorStore
 
 logger = structlog.get_logger(__name__)
@@ -30,6 +40,10 @@ class RagPipeline:
         guard: PromptGuard,
         redactor: PIIRedactor,
         max_context_chars: int,
+        sessions: SessionStore | None = None,
+        summarizer: HistorySummarizer | None = None,
+        relevance: RelevanceGate | None = None,
+        scheduler: PrioritySlots | None = None,
     ) -> None:
         self.embedding = embedding
         self.vector_store = vector_store
@@ -37,6 +51,10 @@ class RagPipeline:
         self.guard = guard
         self.redactor = redactor
         self.max_context_chars = max_context_chars
+        self.sessions = sessions
+        self.summarizer = summarizer
+        self.relevance = relevance
+        self.scheduler = scheduler
 
     async def chat(
         self,
@@ -46,44 +64,244 @@ class RagPipeline:
         model: str,
         temperature: float,
     ) -> ChatResponse:
-        guard_level = request.guard_level or "standard"
-        guard_result = self.guard.check(request.query, guard_level)
+        guard_result = self._check_guard(request)
         if not guard_result.allowed:
-            PROMPT_GUARD_COUNTER.labels(action="blocked").inc()
-            REQUEST_COUNTER.labels(status="guard_block").inc()
-            logger.warning("guard_block", reasons=guard_result.reasons)
-            return ChatResponse(
-                answer="Your query was blocked by the safety system.",
-                sources=[],
-                guard_tripped=True,
-                stats={"reasons": guard_result.reasons},
-            )
+            return self._blocked(guard_result)
+
+        history = SessionHistory()
+        if request.session_id and self.sessions is not None:
+            history = await self._load_history(request.session_id, model)
+        retrieval_query = request.query
+        if not history.empty:
+            retrieval_query = await self._rewrite_query(request.query, history, model)
 
         start_retrieval = perf_counter()
-        query_vector = self.embedding.embed_query(request.query)
-        chunks = self.vector_store.similarity_search(
-            namespace=namespace, vector=query_vector, top_k=request.top_k or 4
-        )
+        # Off the event loop: the first query may wait for the embedding model to finish loading.
+        chunks = await asyncio.to_thread(self._retrieve, request, retrieval_query, namespace)
         RETRIEVAL_LATENCY.observe(perf_counter() - start_retrieval)
 
-        prompt = self._build_prompt(request.query, chunks)
-        start_llm = perf_counter()
+        response = await self._answer(
+            request,
+            chunks,
+            guard_result,
+            model=model,
+            temperature=temperature,
+            history=history,
+            priority=INTERACTIVE,
+        )
+        if retrieval_query != request.query:
+            response.stats["standalone_query"] = retrieval_query
+        return response
+
+    async def chat_many(
+        self,
+        requests: list[ChatRequest],
+        namespace: str,
+        *,
+        model: str,
+        temperature: float,
+        concurrency: int = 4,
+    ) -> AsyncIterator[tuple[int, ChatResponse | Exception]]:
+        """Yields ``(index, response or error)`` in completion order; sessions are not used."""
+        pending: list[tuple[int, ChatRequest, GuardResult]] = []
+        for index, request in enumerate(requests):
+            guard_result = self._check_guard(request)
+            if guard_result.allowed:
+                pending.append((index, request, guard_result))
+            else:
+                yield index, self._blocked(guard_result)
+        if not pending:
+            return
+
+        start_retrieval = perf_counter()
         try:
-            llm_payload = await self.llm.generate(prompt, model=model, temperature=temperature)
-        except TimeoutError:
-            REQUEST_COUNTER.labels(status="llm_timeout").inc()
-            raise
+            vectors = await asyncio.to_thread(
+                self.embedding.embed, [request.query for _, request, _ in pending]
+            )
+            results: list[list[dict] | Exception] = await asyncio.to_thread(
+                partial(
+                    self.vector_store.similarity_search_many,
+                    namespace=namespace,
+                    searches=[
+                        (vector, request.top_k or 4, request.filters)
+                        for (_, request, _), vector in zip(pending, vectors)
+                    ],
+                )
+            )
         except Exception:
-            REQUEST_COUNTER.labels(status="llm_error").inc()
-            raise
-        LLM_LATENCY.observe(perf_counter() - start_llm)
+            # The 200 is already sent; retry one by one so a bad item only fails its own line.
+            logger.exception("batch_retrieval_failed", queries=len(pending))
+            results = [
+                await self._retrieve_or_error(request, namespace) for _, request, _ in pending
+            ]
+        logger.info(
+            "batch_retrieval",
+            queries=len(pending),
+            seconds=round(perf_counter() - start_retrieval, 3),
+        )
+
+        limit = asyncio.Semaphore(concurrency)
+
+        async def answer(
+            index: int, request: ChatRequest, guard_result: GuardResult, chunks: list[dict]
+        ) -> tuple[int, ChatResponse | Exception]:
+            async with limit:
+                try:
+                    response = await self._answer(
+                        request,
+                        chunks,
+                        guard_result,
+                        model=model,
+                        temperature=temperature,
+                        priority=BATCH,
+                    )
+                except Exception as exc:
+                    # Any failure (timeout, HTTP or malformed reply) only fails its own line.
+                    return index, exc
+            return index, response
+
+        for (index, _, _), chunks in zip(pending, results):
+            if isinstance(chunks, Exception):
+                yield index, chunks
+        tasks = [
+            asyncio.create_task(answer(index, request, guard_result, chunks))
+            for (index, request, guard_result), chunks in zip(pending, results)
+            if not isinstance(chunks, Exception)
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _retrieve(self, request: ChatRequest, query: str, namespace: str) -> list[dict]:
+        return self.vector_store.similarity_search(
+            namespace=namespace,
+            vector=self.embedding.embed_query(query),
+            top_k=request.top_k or 4,
+            filters=request.filters,
+        )
+
+    async def _retrieve_or_error(
+        self, request: ChatRequest, namespace: str
+    ) -> list[dict] | Exception:
+        try:
+            return await asyncio.to_thread(self._retrieve, request, request.query, namespace)
+        except Exception as exc:
+            REQUEST_COUNTER.labels(status="retrieval_error").inc()
+            return exc
+
+    def _slot(self, priority: int = INTERACTIVE):
+        return self.scheduler.slot(priority) if self.scheduler is not None else nullcontext()
+
+    def _check_guard(self, request: ChatRequest) -> GuardResult:
+        guard_level = request.guard_level or "standard"
+        return self.guard.check(request.query, guard_level)
+
+    def _blocked(self, guard_result: GuardResult) -> ChatResponse:
+        PROMPT_GUARD_COUNTER.labels(action="blocked").inc()
+        REQUEST_COUNTER.labels(status="guard_block").inc()
+        logger.warning("guard_block", reasons=guard_result.reasons)
+        return ChatResponse(
+            answer="Your query was blocked by the safety system.",
+            sources=[],
+            guard_tripped=True,
+            stats={"reasons": guard_result.reasons},
+        )
+
+    async def _answer(
+        self,
+        request: ChatRequest,
+        chunks: list[dict[str, Any]],
+        guard_result: GuardResult,
+        *,
+        model: str,
+        temperature: float,
+        history: SessionHistory | None = None,
+        priority: int = INTERACTIVE,
+    ) -> ChatResponse:
+        decision: GateDecision | None = None
+        if self.relevance is not None:
+            decision = self.relevance.apply(chunks, request.min_similarity)
+            RELEVANCE_GATE_COUNTER.labels(
+                decision="answer" if decision.passed else "not_found"
+            ).inc()
+            if decision.best_similarity is not None:
+                RETRIEVAL_BEST_SIMILARITY.observe(decision.best_similarity)
+            if decision.dropped:
+                RELEVANCE_CHUNKS_DROPPED.inc(decision.dropped)
+            chunks = decision.chunks
+            if not decision.passed:
+                return self._not_found(request, decision, guard_result.reasons)
+
+        prompt = self._build_prompt(request.query, chunks, history)
+        async with self._slot(priority):
+            start_llm = perf_counter()
+            try:
+                llm_payload = await self.llm.generate(prompt, model=model, temperature=temperature)
+            except TimeoutError:
+                REQUEST_COUNTER.labels(status="llm_timeout").inc()
+                raise
+            except Exception:
+                REQUEST_COUNTER.labels(status="llm_error").inc()
+                raise
+            LLM_LATENCY.observe(perf_counter() - start_llm)
         REQUEST_COUNTER.labels(status="success").inc()
         MODEL_USAGE_COUNTER.labels(model=model).inc()
 
         answer = llm_payload.get("response") or llm_payload.get("message", {}).get("content", "")
-        redacted_answer = self.redactor.redact(answer)
+        redaction = self.redactor.redact_with_report(answer)
+        for rule, hits in redaction.rules.items():
+            PII_REDACTION_COUNTER.labels(rule=rule).inc(hits)
+        redacted_answer = redaction.text.strip()
+        if request.session_id and self.sessions is not None:
+            self.sessions.append(
+                request.session_id, SessionTurn(query=request.query, answer=redacted_answer)
+            )
+
+        stats: dict[str, Any] = {
+            "tokens_context": len(prompt) // 4,
+            "prompt_guard": guard_result.reasons,
+            "model": model,
+        }
+        if decision is not None:
+            stats.update(best_similarity=decision.best_similarity, chunks_dropped=decision.dropped)
+        if redaction.rules:
+            stats["pii_redactions"] = redaction.rules
+        return ChatResponse(
+            answer=redacted_answer,
+            sources=self._sources(chunks),
+            guard_tripped=False,
+            session_id=request.session_id,
+            stats=stats,
+        )
+
+    def _not_found(
+        self, request: ChatRequest, decision: GateDecision, guard_reasons: list[str]
+    ) -> ChatResponse:
+        REQUEST_COUNTER.labels(status="not_found").inc()
+        answer = self.relevance.not_found_answer
+        if request.session_id and self.sessions is not None:
+            self.sessions.append(
+                request.session_id, SessionTurn(query=request.query, answer=answer)
+            )
+        logger.info("relevance_gate_not_found", best_similarity=decision.best_similarity)
+        return ChatResponse(
+            answer=answer,
+            sources=self._sources(decision.chunks),
+            guard_tripped=False,
+            session_id=request.session_id,
+            stats={
+                "prompt_guard": guard_reasons,
+                "relevance_gate": "not_found",
+                "best_similarity": decision.best_similarity,
+                "llm_skipped": True,
+            },
+        )
 
-        sources = [
+    def _sources(self, chunks: list[dict[str, Any]]) -> list[SourceChunk]:
+        return [
             SourceChunk(
                 document_id=chunk["id"],
                 score=chunk.get("score", 0.0),
@@ -93,18 +311,55 @@ class RagPipeline:
             for chunk in chunks
         ]
 
-        return ChatResponse(
-            answer=redacted_answer.strip(),
-            sources=sources,
-            guard_tripped=False,
-            stats={
-                "tokens_context": len(prompt) // 4,
-                "prompt_guard": guard_result.reasons,
-                "model": model,
-            },
+    async def _load_history(self, session_id: str, model: str) -> SessionHistory:
+        history = self.sessions.load(session_id)
+        if self.summarizer is None or not self.summarizer.needs_compaction(history):
+            return history
+        try:
+            async with self._slot(INTERACTIVE):
+                summary, folded = await self.summarizer.summarize(history, model=model)
+        except (TimeoutError, RuntimeError):
+            logger.warning("session_summary_failed", session_id=session_id)
+            return history
+        if not summary:
+            return history
+        dropped = self.sessions.compact(session_id, summary, history.turns[:folded])
+        logger.info("session_compacted", session_id=session_id, folded_turns=dropped)
+        return SessionHistory(summary=summary, turns=history.turns[folded:])
+
+    async def _rewrite_query(self, question: str, history: SessionHistory, model: str) -> str:
+        prompt = (
+            "Rewrite the follow-up question as a standalone question for a document search.\n"
+            "Resolve pronouns and references using the conversation. "
+            "Return only the rewritten question.\n"
+            f"{self._format_history(history)}\n"
+            f"Follow-up question: {question}\n"
+            "Standalone question:"
         )
+        try:
+            async with self._slot(INTERACTIVE):
+                payload = await self.llm.generate(prompt, model=model, temperature=0.0)
+        except (TimeoutError, RuntimeError):
+            logger.warning("query_rewrite_failed")
+            return question
+        rewritten = (payload.get("response") or "").strip().splitlines()
+        return rewritten[0].strip() if rewritten and rewritten[0].strip() else question
+
+    def _format_history(self, history: SessionHistory) -> str:
+        lines = []
+        if history.summary:
+            lines.append(f"Conversation summary: {history.summary}")
+        for turn in history.turns:
+            lines.append(f"User: {turn.query}")
+            lines.append(f"Assistant: {turn.answer}")
+        return "\n".join(lines)
 
-    def _build_prompt(self, question: str, chunks: list[dict[str, Any]]) -> str:
+    def _build_prompt(
+        self,
+        question: str,
+        chunks: list[dict[str, Any]],
+        history: SessionHistory | None = None,
+    ) -> str:
         context = []
         total_chars = 0
         for idx, chunk in enumerate(chunks, start=1):
@@ -116,9 +371,13 @@ class RagPipeline:
             if total_chars >= self.max_context_chars:
                 break
         context_block = "\n---\n".join(context)
+        conversation = ""
+        if history is not None and not history.empty:
+            conversation = f"Conversation so far:\n{self._format_history(history)}\n"
         return (
             "You are a Warehouse Knowledge Assistant for logistics supervisors.\n"
             "Use only the provided sources. If unsure, answer with 'I do not know'.\n"
+            f"{conversation}"
             f"Sources:\n{context_block}\n"
             f"Question: {question}\n"
             "Respond with concise bullet points and cite source numbers like [S1]."
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+NOT_FOUND_ANSWER = (
+    "I could not find this in the warehouse knowledge base. "
+    "The closest sources are listed below."
+)
+
+
+@dataclass
+class GateDecision:
+    passed: bool
+    chunks: list[dict[str, Any]] = field(default_factory=list)
+    best_similarity: float | None = None
+    dropped: int = 0
+
+
+class RelevanceGate:
+    """Skips generation when retrieval is weak and trims hits after a similarity cliff."""
+
+    def __init__(
+        self,
+        min_similarity: float = 0.3,
+        cliff_gap: float = 0.15,
+        min_chunks: int = 1,
+        not_found_answer: str = NOT_FOUND_ANSWER,
+        not_found_sources: int = 3,
+    ) -> None:
+        self.min_similarity = min_similarity
+        self.cliff_gap = cliff_gap
+        self.min_chunks = min_chunks
+        self.not_found_answer = not_found_answer
+        self.not_found_sources = not_found_sources
+
+    @staticmethod
+    def similarity(chunk: dict[str, Any]) -> float:
+        # RediSearch returns the cosine distance for COSINE indexes.
+        return 1.0 - float(chunk.get("score", 1.0))
+
+    def apply(
+        self, chunks: list[dict[str, Any]], min_similarity: float | None = None
+    ) -> GateDecision:
+        threshold = self.min_similarity if min_similarity is None else min_similarity
+        ranked = sorted(chunks, key=self.similarity, reverse=True)
+        if not ranked:
+            return GateDecision(passed=threshold <= 0)
+        best = self.similarity(ranked[0])
+        if best < threshold:
+            return GateDecision(
+                passed=False, chunks=ranked[: self.not_found_sources], best_similarity=best
+            )
+        kept = [ranked[0]]
+        previous = best
+        for chunk in ranked[1:]:
+            current = self.similarity(chunk)
+            if len(kept) >= self.min_chunks and (
+                current < threshold or (self.cliff_gap and previous - current > self.cliff_gap)
+            ):
+                break
+            kept.append(chunk)
+            previous = current
+        return GateDecision(
+            passed=True, chunks=kept, best_similarity=best, dropped=len(ranked) - len(kept)
+        )
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+
+import structlog
+from prometheus_client import REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+from ..instrumentation import EVENT_LOOP_LAG, EXECUTOR_QUEUE_DEPTH, REDIS_POOL_CONNECTIONS
+
+logger = structlog.get_logger(__name__)
+
+
+class MetricsExporter:
+    """Renders the exposition off the event loop and serves it from cache for ``ttl`` seconds.
+
+    With ``multiproc_dir`` set the output aggregates the metric files of every worker.
+    """
+
+    def __init__(self, ttl: float = 1.0, multiproc_dir: str | None = None) -> None:
+        self.ttl = ttl
+        self.multiproc_dir = multiproc_dir
+        if multiproc_dir:
+            self.registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(self.registry, path=multiproc_dir)
+        else:
+            self.registry = REGISTRY
+        self._cached = b""
+        self._rendered_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def render(self) -> bytes:
+        async with self._lock:
+            if monotonic() - self._rendered_at >= self.ttl:
+                self._cached = await asyncio.to_thread(generate_latest, self.registry)
+                self._rendered_at = monotonic()
+            return self._cached
+
+    def close(self) -> None:
+        # Drops this worker's live gauge files so livesum/livemax only cover running workers.
+        if self.multiproc_dir:
+            multiprocess.mark_process_dead(os.getpid(), self.multiproc_dir)
+
+
+class RuntimeMonitor:
+    """Samples event-loop lag, default-executor backlog and Redis pool usage every ``interval``."""
+
+    def __init__(
+        self,
+        interval: float = 1.0,
+        executor: ThreadPoolExecutor | None = None,
+        redis_pool=None,
+    ) -> None:
+        self.interval = interval
+        self.executor = executor
+        self.redis_pool = redis_pool
+
+    async def run(self) -> None:
+        while True:
+            expected = monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.set(max(0.0, monotonic() - expected))
+            try:
+                self.sample()
+            except Exception:  # pragma: no cover - metrics must never break the worker
+                logger.exception("runtime_metrics_failed")
+
+    def sample(self) -> None:
+        if self.executor is not None:
+            EXECUTOR_QUEUE_DEPTH.set(self.executor._work_queue.qsize())
+        if self.redis_pool is not None:
+            in_use = len(getattr(self.redis_pool, "_in_use_connections", ()))
+            idle = len(getattr(self.redis_pool, "_available_connections", ()))
+            REDIS_POOL_CONNECTIONS.labels(state="in_use").set(in_use)
+            REDIS_POOL_CONNECTIONS.labels(state="idle").set(idle)
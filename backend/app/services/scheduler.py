@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+from contextlib import asynccontextmanager
+from itertools import count
+from typing import AsyncIterator
+
+INTERACTIVE = 0
+BATCH = 1
+
+
+class PrioritySlots:
+    """Caps concurrent LLM generations; queued interactive requests always go before batch work.
+
+    ``reserved`` slots are never handed to batch requests so a live chat finds a free slot
+    even while a batch is saturating the rest.
+    """
+
+    def __init__(self, limit: int, reserved: int = 1) -> None:
+        self.limit = max(1, limit)
+        self.reserved = min(max(0, reserved), self.limit - 1)
+        self.in_use = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = count()
+
+    @asynccontextmanager
+    async def slot(self, priority: int = INTERACTIVE) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: int = INTERACTIVE) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                future.cancel()
+            raise
+
+    def release(self) -> None:
+        self.in_use -= 1
+        self._wake()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def _admits(self, priority: int) -> bool:
+        capacity = self.limit if priority == INTERACTIVE else self.limit - self.reserved
+        return self.in_use < capacity
+
+    def _wake(self) -> None:
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._admits(priority):
+                return
+            heapq.heappop(self._waiters)
+            self.in_use += 1
+            future.set_result(None)
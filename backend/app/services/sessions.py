@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+
+import redis
+
+from .ollama import OllamaClient
+
+
+@dataclass
+class SessionTurn:
+    query: str
+    answer: str
+
+    def encode(self) -> bytes:
+        return json.dumps({"q": self.query, "a": self.answer}, separators=(",", ":")).encode(
+            "utf-8"
+        )
+
+    @classmethod
+    def decode(cls, raw: bytes | str) -> "SessionTurn":
+        data = json.loads(raw)
+        return cls(query=data.get("q", ""), answer=data.get("a", ""))
+
+
+@dataclass
+class SessionHistory:
+    summary: str = ""
+    turns: list[SessionTurn] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not self.summary and not self.turns
+
+    def estimated_tokens(self) -> int:
+        chars = len(self.summary) + sum(len(t.query) + len(t.answer) for t in self.turns)
+        return chars // 4
+
+
+class SessionStore:
+    """Keeps a capped, expiring conversation history per session id in Redis."""
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        prefix: str = "session",
+        max_turns: int = 20,
+        ttl_seconds: int = 1800,
+    ) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.max_turns = max_turns
+        self.ttl_seconds = ttl_seconds
+
+    def load(self, session_id: str) -> SessionHistory:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(self._summary_key(session_id))
+        pipe.lrange(self._turns_key(session_id), 0, -1)
+        summary, raw_turns = pipe.execute()
+        if isinstance(summary, bytes):
+            summary = summary.decode("utf-8")
+        return SessionHistory(
+            summary=summary or "",
+            turns=[SessionTurn.decode(raw) for raw in raw_turns or []],
+        )
+
+    def append(self, session_id: str, turn: SessionTurn) -> None:
+        turns_key = self._turns_key(session_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.rpush(turns_key, turn.encode())
+        pipe.ltrim(turns_key, -self.max_turns, -1)
+        pipe.expire(turns_key, self.ttl_seconds)
+        pipe.expire(self._summary_key(session_id), self.ttl_seconds)
+        pipe.execute()
+
+    def compact(self, session_id: str, summary: str, folded_turns: list[SessionTurn]) -> int:
+        """Stores ``summary`` and drops ``folded_turns`` from the head of the history.
+
+        The history may have moved since it was summarized (``append`` capping it, another
+        compaction), so only the leading turns that are still among the folded ones are removed,
+        checked and trimmed under WATCH. Returns the number of removed turns.
+        """
+        turns_key = self._turns_key(session_id)
+        folded = [turn.encode() for turn in folded_turns]
+        dropped = 0
+
+        def trim(pipe: redis.client.Pipeline) -> None:
+            nonlocal dropped
+            head = pipe.lrange(turns_key, 0, len(folded) - 1) if folded else []
+            dropped = _folded_prefix(head, folded)
+            pipe.multi()
+            pipe.set(self._summary_key(session_id), summary.encode("utf-8"), ex=self.ttl_seconds)
+            if dropped:
+                pipe.ltrim(turns_key, dropped, -1)
+
+        self.client.transaction(trim, turns_key)
+        return dropped
+
+    def clear(self, session_id: str) -> None:
+        self.client.delete(self._summary_key(session_id), self._turns_key(session_id))
+
+    def _turns_key(self, session_id: str) -> str:
+        return f"{self.prefix}:{session_id}:turns"
+
+    def _summary_key(self, session_id: str) -> str:
+        return f"{self.prefix}:{session_id}:summary"
+
+
+def _folded_prefix(head: list[bytes], folded: list[bytes]) -> int:
+    # Capping may already have removed the oldest folded turns, so match any suffix of them.
+    for start in range(len(folded)):
+        remaining = folded[start:]
+        if head[: len(remaining)] == remaining:
+            return len(remaining)
+    return 0
+
+
+class HistorySummarizer:
+    """Folds older turns into a running summary once the history exceeds its token budget."""
+
+    def __init__(self, llm: OllamaClient, token_budget: int = 600, keep_turns: int = 2) -> None:
+        self.llm = llm
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+
+    def needs_compaction(self, history: SessionHistory) -> bool:
+        return (
+            len(history.turns) > self.keep_turns and history.estimated_tokens() > self.token_budget
+        )
+
+    async def summarize(self, history: SessionHistory, model: str | None = None) -> tuple[str, int]:
+        folded = len(history.turns) - self.keep_turns
+        transcript = "\n".join(
+            f"User: {turn.query}\nAssistant: {turn.answer}" for turn in history.turns[:folded]
+        )
+        prompt = (
+            "Summarize this warehouse support conversation for later follow-up questions.\n"
+            "Keep facts, numbers, zones and open questions. Use at most 80 words.\n"
+            f"Previous summary: {history.summary or '-'}\n"
+            f"Conversation:\n{transcript}\n"
+            "Summary:"
+        )
+        payload = await self.llm.generate(prompt, model=model, temperature=0.0)
+        summary = (payload.get("response") or "").strip()
+        return summary[: self.token_budget * 4], folded
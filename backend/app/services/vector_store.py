@@ -1,14 +1,117 @@
 from __future__ import annotations
 
 import json
-from typing import Iterable
+import re
+from datetime import datetime, timezone
+from typing import Any, Iterable
 
 import redis
-from redis.commands.search.field import TagField, TextField, VectorField
+from redis.commands.search.field import Field, NumericField, TagField, TextField, VectorField
 from redis.commands.search.index_definition import IndexDefinition, IndexType
 from redis.commands.search.query import Query
 from redis.exceptions import ResponseError
 
+TAG_ESCAPE_REGEX = re.compile(r"([^A-Za-z0-9_])")
+RANGE_OPERATORS = frozenset({"gt", "gte", "lt", "lte"})
+
+
+class FilterError(ValueError):
+    pass
+
+
+class MetadataSchema:
+    """Metadata keys indexed as TAG/NUMERIC fields so filters run inside the KNN query."""
+
+    def __init__(self, tag_fields: Iterable[str] = (), numeric_fields: Iterable[str] = ()) -> None:
+        self.tag_fields = tuple(tag_fields)
+        self.numeric_fields = tuple(numeric_fields)
+
+    def index_fields(self) -> list[Field]:
+        return [TagField(self.attribute(name)) for name in self.tag_fields] + [
+            NumericField(self.attribute(name)) for name in self.numeric_fields
+        ]
+
+    def hash_fields(self, metadata: dict[str, Any]) -> dict[str, str | float]:
+        fields: dict[str, str | float] = {}
+        for name in self.tag_fields:
+            value = metadata.get(name)
+            if value is None:
+                continue
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            fields[self.attribute(name)] = ",".join(str(item).replace(",", " ") for item in values)
+        for name in self.numeric_fields:
+            if metadata.get(name) is None:
+                continue
+            try:
+                fields[self.attribute(name)] = _to_number(metadata[name])
+            except FilterError:
+                continue
+        return fields
+
+    def compile(self, filters: dict[str, Any] | None) -> str:
+        clauses = []
+        for name, condition in (filters or {}).items():
+            if name in self.tag_fields:
+                clauses.append(self._tag_clause(name, condition))
+            elif name in self.numeric_fields:
+                clauses.append(self._numeric_clause(name, condition))
+            else:
+                raise FilterError(f"Metadata field {name!r} is not filterable")
+        return " ".join(clauses)
+
+    def attribute(self, name: str) -> str:
+        return f"meta_{name}"
+
+    def attributes(self) -> list[str]:
+        return [self.attribute(name) for name in (*self.tag_fields, *self.numeric_fields)]
+
+    def _tag_clause(self, name: str, condition: Any) -> str:
+        values = condition if isinstance(condition, list) else [condition]
+        if not values or any(isinstance(value, (dict, list)) for value in values):
+            raise FilterError(f"Filter on {name!r} expects a value or a list of values")
+        escaped = " | ".join(TAG_ESCAPE_REGEX.sub(r"\\\1", str(value)) for value in values)
+        return f"@{self.attribute(name)}:{{{escaped}}}"
+
+    def _numeric_clause(self, name: str, condition: Any) -> str:
+        field = self.attribute(name)
+        if isinstance(condition, dict):
+            unknown = set(condition) - RANGE_OPERATORS
+            if unknown or not condition:
+                raise FilterError(f"Range filter on {name!r} supports gt, gte, lt and lte")
+            low, high = "-inf", "+inf"
+            if "gte" in condition:
+                low = _format_number(condition["gte"])
+            if "gt" in condition:
+                low = f"({_format_number(condition['gt'])}"
+            if "lte" in condition:
+                high = _format_number(condition["lte"])
+            if "lt" in condition:
+                high = f"({_format_number(condition['lt'])}"
+            return f"@{field}:[{low} {high}]"
+        values = condition if isinstance(condition, list) else [condition]
+        if not values:
+            raise FilterError(f"Filter on {name!r} expects at least one value")
+        ranges = [f"@{field}:[{number} {number}]" for number in map(_format_number, values)]
+        return ranges[0] if len(ranges) == 1 else f"({' | '.join(ranges)})"
+
+
+def _to_number(value: Any) -> float:
+    if isinstance(value, bool):
+        raise FilterError(f"Expected a number or ISO date, got {value!r}")
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise FilterError(f"Expected a number or ISO date, got {value!r}") from None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _format_number(value: Any) -> str:
+    return repr(_to_number(value))
+
 
 class RedisVectorStore:
     def __init__(
@@ -18,25 +121,33 @@ class RedisVectorStore:
         vector_field: str = "embedding",
         prefix: str = "doc",
         dim: int = 384,
+        metadata_schema: MetadataSchema | None = None,
     ) -> None:
         self.client = client
         self.index_name = index_name
         self.vector_field = vector_field
         self.prefix = prefix
         self.dim = dim
+        self.metadata_schema = metadata_schema or MetadataSchema()
 
     def ensure_index(self) -> None:
         index = self.client.ft(self.index_name)
         try:
-            index.info()
-            return
+            info = index.info()
         except ResponseError:
-            pass
+            info = None
+        if info is not None:
+            existing = {_decode(attribute[1]) for attribute in info.get("attributes", [])}
+            for field in self.metadata_schema.index_fields():
+                if field.name not in existing:
+                    index.alter_schema_add([field])
+            return
 
         schema = (
             TextField("text"),
             TagField("namespace"),
             TextField("metadata"),
+            *self.metadata_schema.index_fields(),
             VectorField(
                 self.vector_field,
                 "HNSW",
@@ -54,23 +165,82 @@ class RedisVectorStore:
         pipe = self.client.pipeline(transaction=False)
         for doc in documents:
             key = f"{self.prefix}:{doc['id']}"
+            metadata = doc.get("metadata") or {}
             payload = {
                 "text": doc["text"],
                 "namespace": namespace,
-                "metadata": json.dumps(doc.get("metadata", {})),
+                "metadata": json.dumps(metadata),
                 self.vector_field: self._to_bytes(doc["embedding"]),
             }
-            pipe.hset(key, mapping=payload)
+            self._write(pipe, key, payload, metadata)
         pipe.execute()
         return len(documents)
 
-    def similarity_search(self, *, namespace: str, vector: list[float], top_k: int) -> list[dict]:
-        namespace_tag = self._escape_tag(namespace)
-        query = Query(
-            f"(@namespace:{{{namespace_tag}}})=>[KNN {top_k} @{self.vector_field} $vec AS score]"
-        ).return_fields("text", "metadata", "score")
+    def delete_chunks(self, doc_id: str, start: int, end: int) -> int:
+        keys = [f"{self.prefix}:{doc_id}:{idx}" for idx in range(start, end)]
+        return int(self.client.delete(*keys)) if keys else 0
+
+    def delete_ids(self, ids: Iterable[str]) -> int:
+        keys = [f"{self.prefix}:{chunk_id}" for chunk_id in ids]
+        return int(self.client.delete(*keys)) if keys else 0
+
+    def update_metadata(self, updates: dict[str, dict[str, Any]]) -> None:
+        """Rewrites metadata and filter fields of stored chunks without re-embedding them."""
+        pipe = self.client.pipeline(transaction=False)
+        for chunk_id, metadata in updates.items():
+            self._write(
+                pipe, f"{self.prefix}:{chunk_id}", {"metadata": json.dumps(metadata)}, metadata
+            )
+        pipe.execute()
+
+    def _write(
+        self, pipe: redis.client.Pipeline, key: str, payload: dict, metadata: dict[str, Any]
+    ) -> None:
+        # Filter fields the new metadata lacks must go, or the chunk keeps matching old filters.
+        fields = self.metadata_schema.hash_fields(metadata)
+        stale = [name for name in self.metadata_schema.attributes() if name not in fields]
+        if stale:
+            pipe.hdel(key, *stale)
+        pipe.hset(key, mapping={**payload, **fields})
+
+    def similarity_search(
+        self,
+        *,
+        namespace: str,
+        vector: list[float],
+        top_k: int,
+        filters: dict[str, Any] | None = None,
+    ) -> list[dict]:
+        query = self._knn_query(namespace, top_k, filters)
         params = {"vec": self._to_bytes(vector)}
         results = self.client.ft(self.index_name).search(query, query_params=params)
+        return self._chunks(results)
+
+    def similarity_search_many(
+        self,
+        *,
+        namespace: str,
+        searches: list[tuple[list[float], int, dict[str, Any] | None]],
+    ) -> list[list[dict]]:
+        """Runs one KNN query per (vector, top_k, filters) in a single pipelined round-trip."""
+        pipe = self.client.ft(self.index_name).pipeline(transaction=False)
+        for vector, top_k, filters in searches:
+            pipe.search(
+                self._knn_query(namespace, top_k, filters),
+                query_params={"vec": self._to_bytes(vector)},
+            )
+        return [self._chunks(results) for results in pipe.execute()] if searches else []
+
+    def _knn_query(self, namespace: str, top_k: int, filters: dict[str, Any] | None) -> Query:
+        prefilter = f"@namespace:{{{self._escape_tag(namespace)}}}"
+        metadata_filter = self.metadata_schema.compile(filters)
+        if metadata_filter:
+            prefilter = f"{prefilter} {metadata_filter}"
+        return Query(
+            f"({prefilter})=>[KNN {top_k} @{self.vector_field} $vec AS score]"
+        ).return_fields("text", "metadata", "score")
+
+    def _chunks(self, results) -> list[dict]:
         chunks = []
         for doc in results.docs:
             metadata = doc.metadata
@@ -96,4 +266,8 @@ class RedisVectorStore:
         return array.array("f", vector).tobytes()
 
     def _escape_tag(self, value: str) -> str:
-        return value.replace("-", r"\-")
+        return TAG_ESCAPE_REGEX.sub(r"\\\1", value)
+
+
+def _decode(value: bytes | str) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
@@ -0,0 +1,8 @@
+#!/bin/sh
+set -e
+# Metric files from a previous container run would be summed into the new totals.
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+exec "$@"
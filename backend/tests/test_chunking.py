@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import chunking
+from app.services.chunking import (
+    Chunker,
+    CsvRowGroupSplitter,
+    MarkdownHeadingSplitter,
+    TokenWindowSplitter,
+    iter_lines,
+    tokenizer_source,
+)
+
+
+def test_markdown_splitter_carries_heading_path():
+    text = "# Handbook\n\n## Receiving\nDocks run 220 pallets/h.\n\n## Putaway\nZones C1-C3 at 4C."
+    chunks = list(MarkdownHeadingSplitter().split_text(text))
+    assert [chunk.metadata["section"] for chunk in chunks] == ["Receiving", "Putaway"]
+    assert chunks[0].text.startswith("Handbook > Receiving\n")
+    assert "220 pallets/h" in chunks[0].text
+
+
+def test_markdown_splitter_ignores_headings_in_code_fences():
+    text = "## Setup\n```\n# not a heading\n```\nDone."
+    chunks = list(MarkdownHeadingSplitter().split_text(text))
+    assert len(chunks) == 1
+    assert "# not a heading" in chunks[0].text
+
+
+def test_token_window_keeps_sentences_and_bounds_size():
+    text = "One two three four. Five six seven eight nine. Ten 0.82 eleven. " + " ".join(
+        f"w{i}" for i in range(25)
+    )
+    chunks = [
+        chunk.text
+        for chunk in TokenWindowSplitter(max_tokens=10, overlap_tokens=3).split_text(text)
+    ]
+    assert chunks[0] == "One two three four. Five six seven eight nine."
+    assert "0.82" in chunks[1]
+    assert all(len(chunk.split()) <= 10 for chunk in chunks)
+
+
+def test_csv_splitter_never_cuts_rows():
+    lines = [f"process=p{i}, metric=m, value={i}" for i in range(5)]
+    chunks = list(CsvRowGroupSplitter(rows_per_chunk=2).chunks(lines))
+    assert [chunk.metadata["row_start"] for chunk in chunks] == [0, 2, 4]
+    assert chunks[1].text.splitlines() == lines[2:4]
+
+
+def test_chunker_stream_matches_split():
+    text = "ABCDEFGHIJ\nKLMNOPQRST\nUVWXYZ"
+    chunker = Chunker(chunk_size=8, overlap=2)
+    assert [chunk.text for chunk in chunker.chunks(iter_lines(text))] == chunker.split(text)
+
+
+class PieceTokenizer:
+    """Splits every word into pieces of at most three characters, like a wordpiece vocabulary."""
+
+    def encode_batch(self, words, add_special_tokens=False):
+        return [SimpleNamespace(ids=list(range(-(-len(word) // 3)))) for word in words]
+
+
+def test_token_window_counts_tokenizer_pieces_including_heading():
+    tokenizer = PieceTokenizer()
+    window = TokenWindowSplitter(max_tokens=20, overlap_tokens=4, tokenizer=tokenizer)
+    text = "## Kommissionierung\n" + " ".join(["Lagerplatzverwaltung"] * 12) + "."
+    chunks = list(MarkdownHeadingSplitter(window).split_text(text))
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert sum(window.count_words(chunk.text.split())) <= 20
+
+
+def test_token_window_loads_tokenizer_source_on_first_use(monkeypatch):
+    sources = []
+    monkeypatch.setattr(
+        chunking, "load_tokenizer", lambda source: sources.append(source) or PieceTokenizer()
+    )
+    window = TokenWindowSplitter(max_tokens=200, tokenizer_source="model")
+    assert sources == []
+
+    list(window.split_text("Lagerplatzverwaltung."))
+    window.load()
+
+    assert sources == ["model"]
+    assert isinstance(window.tokenizer, PieceTokenizer)
+    assert window.max_tokens == 200
+
+
+def test_token_window_falls_back_to_conservative_budget_without_tokenizer(monkeypatch):
+    def unavailable(source):
+        raise OSError("offline")
+
+    monkeypatch.setattr(chunking, "load_tokenizer", unavailable)
+    window = TokenWindowSplitter(max_tokens=200, tokenizer_source="model")
+
+    with pytest.raises(OSError):
+        window.load()
+    assert window.tokenizer is None
+    assert window.max_tokens == chunking.DEFAULT_MAX_TOKENS
+    assert len(list(window.split_text("Dock."))) == 1
+
+
+def test_tokenizer_source_prefers_local_onnx_export(tmp_path):
+    assert tokenizer_source("custom", tmp_path, "hub/model") == "custom"
+    assert tokenizer_source(None, tmp_path, "hub/model") == "hub/model"
+    (tmp_path / "tokenizer.json").write_text("{}", encoding="utf-8")
+    assert tokenizer_source(None, tmp_path, "hub/model") == tmp_path / "tokenizer.json"
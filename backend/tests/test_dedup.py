@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+from app.services.dedup import ChunkDeduplicator
+from app.services.ingestion import BatchWriter
+
+ROW = "ts={ts}, process=receiving, metric=dock_utilization, value=0.82, unit=ratio"
+
+
+def _chunk(chunk_id: str, text: str, **metadata) -> dict:
+    return {"id": chunk_id, "text": text, "metadata": metadata}
+
+
+def test_rows_differing_only_in_timestamp_collapse_with_provenance():
+    dedup = ChunkDeduplicator(merge_fields=("site",), per_document=False)
+    first = _chunk("ops-a.csv:0", ROW.format(ts="2024-05-01T06:00:00Z"), site="hamburg")
+    copy = _chunk("ops-b.csv:0", ROW.format(ts="2024-05-02T06:00:00Z"), site="bremen")
+    other = _chunk("ops-a.csv:1", "process=picking, metric=p95_batch_cycle, value=18")
+
+    assert not dedup.text_duplicate(first)
+    assert dedup.text_duplicate(copy)
+    assert not dedup.text_duplicate(other)
+
+    assert first["metadata"]["site"] == ["hamburg", "bremen"]
+    assert first["metadata"]["duplicates"] == 1
+    assert first["metadata"]["provenance"] == [{"id": "ops-b.csv:0", "site": "bremen"}]
+    assert dedup.canonical_id("ops-b.csv:0") == "ops-a.csv:0"
+    assert dedup.stats.snapshot()["dedup_ratio"] == round(1 / 3, 4)
+
+
+def test_dates_in_prose_keep_revisions_apart():
+    # Loose thresholds: only the differing dates may keep the revisions apart.
+    dedup = ChunkDeduplicator(0.3, per_document=False, embedding_similarity=0.5)
+    faq = (
+        "## Wareneingang\nAnnahmeschluss für Lieferungen an Tor 3 ist {time} Uhr, "
+        "Avis mindestens 24 Stunden vorher, gültig ab {date} für alle Standorte."
+    )
+    old = _chunk("faq_v1.md:0", faq.format(time="14:00", date="01.03.2024"))
+    new = _chunk("faq_v2.md:0", faq.format(time="16:30", date="01.09.2024"))
+    same = _chunk("faq_v3.md:0", faq.format(time="14:00", date="01.03.2024"))
+
+    assert not dedup.text_duplicate(old)
+    assert not dedup.text_duplicate(new)
+    assert dedup.text_duplicate(same)
+    assert not dedup.embedding_duplicate({**new, "embedding": [1.0, 0.0]})
+    assert not dedup.embedding_duplicate({**old, "embedding": [1.0, 0.0]})
+
+
+def test_leading_log_timestamps_are_masked():
+    dedup = ChunkDeduplicator(per_document=False)
+    line = "{ts} WARN dock 4 scanner offline, fallback to manual receiving"
+
+    assert not dedup.text_duplicate(_chunk("a.log:0", line.format(ts="2024-05-01 06:00:01")))
+    assert dedup.text_duplicate(_chunk("b.log:0", line.format(ts="2024-05-02T07:12:44Z")))
+
+
+def test_per_document_scope_and_partition_fields_keep_copies_apart():
+    dedup = ChunkDeduplicator(partition_fields=("effective_date",))
+    text = ROW.format(ts="2024-05-01")
+
+    assert not dedup.text_duplicate(_chunk("a:0", text, effective_date="2024-01-01"))
+    assert not dedup.text_duplicate(_chunk("b:0", text, effective_date="2024-01-01"))
+    assert dedup.text_duplicate(_chunk("a:1", text, effective_date="2024-01-01"))
+    assert not dedup.text_duplicate(_chunk("a:2", text, effective_date="2024-06-01"))
+
+
+def test_batch_writer_drops_duplicates_and_updates_flushed_chunks():
+    embedding = MagicMock()
+    embedding.embed.side_effect = lambda texts: [[1.0, 0.0] for _ in texts]
+    store = MagicMock()
+    store.upsert.side_effect = lambda namespace, documents: len(documents)
+    dedup = ChunkDeduplicator(embedding_similarity=0.99)
+    writer = BatchWriter(embedding, store, "ns", batch_size=1, dedup=dedup)
+
+    writer.write(
+        [
+            _chunk("doc:0", ROW.format(ts="06:00")),
+            _chunk("doc:1", ROW.format(ts="07:00")),
+            _chunk("doc:2", "Completely different wording, same vector"),
+        ]
+    )
+    writer.flush()
+
+    assert writer.count == 1
+    upserted = [
+        [doc["id"] for doc in call.kwargs["documents"]] for call in store.upsert.call_args_list
+    ]
+    assert upserted == [["doc:0"]]
+    updated = store.update_metadata.call_args.args[0]
+    assert updated["doc:0"]["duplicates"] == 2
+    deleted = [chunk_id for call in store.delete_ids.call_args_list for chunk_id in call.args[0]]
+    assert deleted == ["doc:1", "doc:2"]
@@ -0,0 +1,39 @@
+import pytest
+
+from app.services.embedding import EmbeddingBackend, EmbeddingService, OnnxBackend, build_backend
+
+
+class CountingBackend(EmbeddingBackend):
+    name = "fake"
+
+    def __init__(self):
+        self.loads = 0
+
+    def load(self) -> None:
+        self.loads += 1
+
+    def encode(self, texts):
+        return [[float(len(text)), 0.0] for text in texts]
+
+
+def test_service_loads_backend_once_and_reports_ready():
+    backend = CountingBackend()
+    service = EmbeddingService("fake-model", backend=backend)
+    assert not service.ready
+
+    assert service.embed_query("dock") == [4.0, 0.0]
+    service.load()
+
+    assert service.ready
+    assert backend.loads == 1
+    assert service.embed([]) == []
+
+
+def test_build_backend_selects_implementation(tmp_path):
+    backend = build_backend("onnx", "unused", onnx_path=tmp_path, quantized=False)
+    assert isinstance(backend, OnnxBackend)
+    assert backend.model_path == tmp_path / "model.onnx"
+    with pytest.raises(FileNotFoundError):
+        backend.load()
+    with pytest.raises(ValueError):
+        build_backend("tensorflow", "unused")
@@ -0,0 +1,110 @@
+import asyncio
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+from app.services.embedding import EmbeddingBackend
+from app.services.embedding_sidecar import SidecarBackend, decode_vectors, encode_vectors, serve
+
+
+class RecordingBackend(EmbeddingBackend):
+    name = "fake"
+
+    def __init__(self):
+        self.loaded = False
+        self.batches: list[int] = []
+
+    def load(self) -> None:
+        self.loaded = True
+
+    def encode(self, texts):
+        self.batches.append(len(texts))
+        return [[float(len(text)), 0.5, -1.0] for text in texts]
+
+
+class SlowLoadingBackend(RecordingBackend):
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def load(self) -> None:
+        self.release.wait(timeout=5)
+        super().load()
+
+
+def test_vector_frames_roundtrip_float32():
+    frame = encode_vectors(np.array([[0.25, -1.5], [3.0, 0.125]], dtype=np.float64))
+    assert decode_vectors(frame[9:], 2, 2) == [[0.25, -1.5], [3.0, 0.125]]
+
+
+@pytest.mark.asyncio
+async def test_sidecar_batches_requests_from_several_clients(tmp_path):
+    socket_path = tmp_path / "embed.sock"
+    backend = RecordingBackend()
+    ready = asyncio.Event()
+    server = asyncio.create_task(serve(socket_path, backend, max_wait_ms=50, ready=ready))
+    await ready.wait()
+
+    clients = [SidecarBackend(socket_path, fallback=RecordingBackend()) for _ in range(4)]
+    results = await asyncio.gather(
+        *(asyncio.to_thread(client.encode, ["dock", "zone ä"]) for client in clients)
+    )
+    server.cancel()
+
+    assert results[0] == [[4.0, 0.5, -1.0], [6.0, 0.5, -1.0]]
+    assert sum(backend.batches) == 8
+    assert len(backend.batches) < 4
+    assert not any(client.fallback.loaded for client in clients)
+
+
+@pytest.mark.asyncio
+async def test_client_waits_for_sidecar_that_is_still_loading(tmp_path):
+    socket_path = tmp_path / "embed.sock"
+    backend = SlowLoadingBackend()
+    server = asyncio.create_task(serve(socket_path, backend))
+    while not socket_path.exists():
+        await asyncio.sleep(0.01)
+
+    client = SidecarBackend(socket_path, fallback=RecordingBackend(), startup_timeout=5)
+    loading = asyncio.create_task(asyncio.to_thread(client.load))
+    await asyncio.sleep(0.2)
+    assert not loading.done()
+    backend.release.set()
+    await loading
+    vectors = await asyncio.to_thread(client.encode, ["dock"])
+    server.cancel()
+
+    assert vectors == [[4.0, 0.5, -1.0]]
+    assert not client.using_fallback
+    assert not client.fallback.loaded
+
+
+def test_sidecar_falls_back_to_in_process_backend_when_encode_fails(tmp_path):
+    fallback = RecordingBackend()
+    client = SidecarBackend(tmp_path / "missing.sock", fallback=fallback, startup_timeout=0)
+
+    client.load()
+    assert fallback.loaded
+    assert client.using_fallback
+
+    assert client.encode(["pallet"]) == [[6.0, 0.5, -1.0]]
+    assert fallback.batches == [1]
+
+
+def test_sidecar_timeout_does_not_switch_to_fallback(tmp_path):
+    path = str(tmp_path / "busy.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    fallback = RecordingBackend()
+    client = SidecarBackend(path, fallback=fallback, timeout=0.05)
+    try:
+        with pytest.raises(TimeoutError):
+            client.encode(["pallet"])
+    finally:
+        client.close()
+        server.close()
+    assert not fallback.loaded
+    assert not client.using_fallback
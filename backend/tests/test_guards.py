@@ -1,4 +1,4 @@
-from app.services.guards import PIIRedactor, PromptGuard
+from app.services.guards import AhoCorasick, PIIRedactor, PromptGuard
 
 
 def test_prompt_guard_blocks_injection():
@@ -12,3 +12,24 @@ def test_pii_redactor_masks_email():
     redactor = PIIRedactor()
     text = "Contact john.doe@example.com for access"
     assert "[REDACTED]" in redactor.redact(text)
+
+
+def test_prompt_guard_matches_blocklist_case_insensitively():
+    guard = PromptGuard(blocklist=("Reveal System Prompt", "shutdown"))
+    result = guard.check("please SHUTDOWN dock 4", level="standard")
+    assert result.reasons == ["blocklisted_phrase"]
+    assert guard.check("how many docks are open?").allowed
+
+
+def test_aho_corasick_reports_overlapping_matches():
+    matcher = AhoCorasick(["he", "she", "hers"])
+    assert list(matcher.iter_matches("ushers")) == [(1, "she"), (2, "he"), (2, "hers")]
+
+
+def test_pii_redactor_reports_fired_rules():
+    redactor = PIIRedactor()
+    result = redactor.redact_with_report(
+        "IBAN DE89 3704 0044 0532 0130 00, truck HH-AB 1234, zones C1-C3 hold 4C"
+    )
+    assert result.rules == {"iban": 1, "license_plate": 1}
+    assert "C1-C3" in result.text
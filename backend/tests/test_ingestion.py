@@ -1,7 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from app.schemas import IngestDocument
-from app.services.ingestion import Chunker, DocumentParser, IngestionService
+from app.services.ingestion import (
+    Chunker,
+    DocumentParser,
+    IngestionService,
+    ThroughputTracker,
+    _extract_pages,
+    _open_pdf,
+)
 
 
 def test_document_parser_reads_markdown(tmp_path: Path):
@@ -26,3 +34,78 @@ def test_ingestion_service_creates_chunks(tmp_path: Path):
     prepared = service.prepare(IngestDocument(path="doc.md", mime_type="text/markdown"))
     assert prepared
     assert prepared[0]["text"].strip()
+
+
+def _write_pdf(path: Path, pages: list[str]) -> None:
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", ""]
+    font_id = 3
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 20 50 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 200 100] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for idx, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += f"{idx} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    body += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF"
+    ).encode("latin-1")
+    path.write_bytes(body)
+
+
+def test_csv_parser_streams_row_batches(tmp_path: Path):
+    csv_file = tmp_path / "ops.csv"
+    csv_file.write_text(
+        "process,metric\n" + "".join(f"p{i},m{i}\n" for i in range(5)), encoding="utf-8"
+    )
+    seen: list[int] = []
+    parser = DocumentParser(base_path=tmp_path, csv_batch_rows=2)
+    blocks = list(
+        parser.iter_text(IngestDocument(path="ops.csv"), lambda p: seen.append(p.bytes_read))
+    )
+    assert blocks[0] == "process=p0, metric=m0\nprocess=p1, metric=m1"
+    assert len(blocks) == 3
+    assert seen[-1] == csv_file.stat().st_size
+
+
+def test_pdf_parser_extracts_pages_in_worker_pool(tmp_path: Path):
+    _write_pdf(tmp_path / "manual.pdf", [f"Page {i} dock rules" for i in range(5)])
+    parser = DocumentParser(base_path=tmp_path, pdf_workers=2, pdf_pages_per_task=2)
+    tracker = ThroughputTracker()
+    try:
+        pages = list(parser.iter_text(IngestDocument(path="manual.pdf"), tracker))
+    finally:
+        parser.close()
+    assert [page.strip() for page in pages] == [f"Page {i} dock rules" for i in range(5)]
+    assert tracker.pages == 5
+
+
+def test_concurrent_requests_share_one_pdf_pool(tmp_path: Path):
+    parser = DocumentParser(base_path=tmp_path, pdf_workers=2)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as threads:
+            pools = set(map(id, threads.map(lambda _: parser._executor(), range(32))))
+    finally:
+        parser.close()
+    assert len(pools) == 1
+
+
+def test_pdf_reader_is_kept_only_until_the_last_page(tmp_path: Path):
+    _write_pdf(tmp_path / "manual.pdf", [f"Page {i}" for i in range(3)])
+    path = str(tmp_path / "manual.pdf")
+
+    assert _extract_pages(path, 0, 2) == ["Page 0", "Page 1"]
+    assert _open_pdf.reader is not None
+    assert _extract_pages(path, 2, 3) == ["Page 2"]
+    assert _open_pdf.reader is None and _open_pdf.handle is None
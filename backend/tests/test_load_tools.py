@@ -0,0 +1,57 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS = Path(__file__).resolve().parents[2] / "scripts"
+
+
+def _load(name: str):
+    spec = importlib.util.spec_from_file_location(name, SCRIPTS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module  # dataclasses resolve annotations through sys.modules
+    spec.loader.exec_module(module)
+    return module
+
+
+load_harness = _load("load_harness")
+stub_ollama = _load("stub_ollama")
+
+
+def test_stub_answer_is_deterministic_per_prompt_and_seed():
+    profile = stub_ollama.StubProfile(answer_tokens=40)
+    first = stub_ollama.plan_answer("Wie hoch ist der Dock-Durchsatz?", profile)
+
+    assert stub_ollama.plan_answer("Wie hoch ist der Dock-Durchsatz?", profile) == first
+    assert stub_ollama.plan_answer("Welche Zonen sind gekühlt?", profile) != first
+    reseeded = stub_ollama.StubProfile(answer_tokens=40, seed=1)
+    assert stub_ollama.plan_answer("Wie hoch ist der Dock-Durchsatz?", reseeded) != first
+    tokens, factor = first
+    assert 32 <= sum(token != "." for token in tokens) <= 48
+    assert 0.9 <= factor <= 1.1
+
+
+def test_percentile_interpolates_between_ranks():
+    values = [0.1, 0.2, 0.3, 0.4]
+
+    assert load_harness.percentile([], 95) is None
+    assert load_harness.percentile([0.5], 99) == 0.5
+    assert load_harness.percentile(values, 0) == 0.1
+    assert load_harness.percentile(values, 100) == 0.4
+    assert load_harness.percentile(values, 50) == pytest.approx(0.25)
+
+
+def test_responses_without_llm_call_are_not_successes():
+    classify = load_harness.classify
+    assert classify({"answer": "…", "stats": {"model": "mistral"}}) == "answered"
+    assert classify({"guard_tripped": True, "stats": {}}) == "guard_blocked"
+    assert classify({"stats": {"relevance_gate": "not_found"}}) == "not_found"
+
+    Sample = load_harness.Sample
+    stage = load_harness.StageResult(
+        1, 2.0, [Sample("repeat", 0.5), Sample("cold", 0.01, outcome="not_found")]
+    )
+    assert stage.throughput == 0.5
+    assert stage.latencies() == [0.5]
+    assert stage.summary()["outcomes"] == {"answered": 1, "not_found": 1, "guard_blocked": 0}
@@ -0,0 +1,196 @@
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app.config import Settings
+from app.main import ingest
+from app.schemas import IngestRequest
+from app.services.ingestion import (
+    BatchWriter,
+    Chunker,
+    ChunkSourceError,
+    DocumentParser,
+    IngestionService,
+)
+from app.services.manifest import FileManifest, SourceScanner
+
+
+def _tree(base: Path) -> None:
+    (base / "faq").mkdir()
+    (base / "faq" / "a.md").write_text("# A\nalpha", encoding="utf-8")
+    (base / "faq" / "b.md").write_text("# B\nbeta", encoding="utf-8")
+    (base / "ops.csv").write_text("k,v\n1,2\n", encoding="utf-8")
+    (base / "image.png").write_bytes(b"\x89PNG")
+
+
+def test_scanner_skips_files_recorded_in_manifest(tmp_path: Path):
+    _tree(tmp_path)
+    scanner = SourceScanner(tmp_path)
+    manifest = FileManifest(fakeredis.FakeRedis())
+
+    first = scanner.scan(".", manifest.load("ns"))
+    assert sorted(item.relative for item in first.changed) == ["faq/a.md", "faq/b.md", "ops.csv"]
+    manifest.record("ns", {item.relative: item.fingerprint for item in first.changed})
+
+    second = scanner.scan(".", manifest.load("ns"))
+    assert second.changed == [] and second.unchanged == 3
+
+
+def test_scanner_detects_touched_and_changed_files(tmp_path: Path):
+    _tree(tmp_path)
+    scanner = SourceScanner(tmp_path)
+    manifest = FileManifest(fakeredis.FakeRedis())
+    manifest.record(
+        "ns", {item.relative: item.fingerprint for item in scanner.scan(".", {}).changed}
+    )
+
+    touched = tmp_path / "faq" / "a.md"
+    os.utime(touched, ns=(1, 1))
+    (tmp_path / "faq" / "b.md").write_text("# B\nbeta v2", encoding="utf-8")
+
+    result = scanner.scan("faq/*.md", manifest.load("ns"))
+    assert [item.relative for item in result.touched] == ["faq/a.md"]
+    assert [item.relative for item in result.changed] == ["faq/b.md"]
+
+
+def test_scanner_rejects_paths_outside_data_path(tmp_path: Path):
+    (tmp_path / "data").mkdir()
+    with pytest.raises(ValueError):
+        SourceScanner(tmp_path / "data").scan("../", {})
+
+
+class _Embedding:
+    def embed(self, texts):
+        return [[0.0] for _ in texts]
+
+
+class _Store:
+    def __init__(self):
+        self.batches: list[int] = []
+        self.ids: list[str] = []
+        self.deleted: list[tuple[str, int, int]] = []
+
+    def upsert(self, *, namespace: str, documents: list[dict]) -> int:
+        self.batches.append(len(documents))
+        self.ids.extend(doc["id"] for doc in documents)
+        return len(documents)
+
+    def delete_chunks(self, doc_id: str, start: int, end: int) -> int:
+        self.deleted.append((doc_id, start, end))
+        return end - start
+
+
+def test_batch_writer_reports_chunks_after_they_are_stored():
+    store = _Store()
+    stored: list[int] = []
+    writer = BatchWriter(_Embedding(), store, "ns", batch_size=2)
+    writer.write(({"id": str(i), "text": "t"} for i in range(3)), on_stored=stored.append)
+    assert stored == []
+    writer.flush()
+    assert stored == [3]
+    assert store.batches == [2, 1]
+
+
+def test_scanner_reports_removed_files_within_scope(tmp_path: Path):
+    _tree(tmp_path)
+    scanner = SourceScanner(tmp_path)
+    manifest = FileManifest(fakeredis.FakeRedis())
+    manifest.record(
+        "ns", {item.relative: item.fingerprint for item in scanner.scan(".", {}).changed}
+    )
+    (tmp_path / "faq" / "a.md").unlink()
+    (tmp_path / "ops.csv").unlink()
+
+    result = scanner.scan("faq/*.md", manifest.load("ns"))
+    assert list(result.removed) == ["faq/a.md"]
+    assert list(scanner.scan(".", manifest.load("ns"), recursive=False).removed) == ["ops.csv"]
+
+    manifest.forget("ns", list(result.removed))
+    assert sorted(manifest.load("ns")) == ["faq/b.md", "ops.csv"]
+
+
+def test_scanner_rejects_recursive_glob_when_not_recursive(tmp_path: Path):
+    _tree(tmp_path)
+    with pytest.raises(ValueError):
+        SourceScanner(tmp_path).scan("**/*.md", {}, recursive=False)
+
+
+def test_scanner_skips_symlinks_leaving_the_data_path(tmp_path: Path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "secret.md").write_text("# Secret", encoding="utf-8")
+    (tmp_path / "data" / "a.md").write_text("# A", encoding="utf-8")
+    (tmp_path / "data" / "leak.md").symlink_to(tmp_path / "secret.md")
+    (tmp_path / "data" / "alias.md").symlink_to(tmp_path / "data" / "a.md")
+
+    result = SourceScanner(tmp_path / "data").scan(".", {})
+    assert sorted(item.relative for item in result.changed) == ["a.md"]
+
+
+def test_batch_writer_discards_pending_chunks_of_a_failed_source():
+    store = _Store()
+    stored: list[int] = []
+    writer = BatchWriter(_Embedding(), store, "ns", batch_size=10)
+    writer.write(({"id": f"a:{i}", "text": "t"} for i in range(2)), on_stored=stored.append)
+
+    def broken():
+        yield {"id": "b:0", "text": "t"}
+        raise OSError("truncated")
+
+    with pytest.raises(ChunkSourceError, match="truncated"):
+        writer.write(broken(), on_stored=stored.append)
+    writer.flush()
+    assert store.ids == ["a:0", "a:1"]
+    assert stored == [2]
+
+
+def _app_request(tmp_path: Path, store: _Store, manifest: FileManifest) -> SimpleNamespace:
+    state = SimpleNamespace(
+        ingestion_service=IngestionService(
+            DocumentParser(base_path=tmp_path), Chunker(chunk_size=200, overlap=0)
+        ),
+        embedding=_Embedding(),
+        vector_store=store,
+        manifest=manifest,
+        scanner=SourceScanner(tmp_path),
+    )
+    return SimpleNamespace(app=SimpleNamespace(state=state))
+
+
+def test_ingest_sources_namespaces_chunks_purges_removed_and_skips_bad_files(tmp_path: Path):
+    _tree(tmp_path)
+    store = _Store()
+    manifest = FileManifest(fakeredis.FakeRedis())
+    request = _app_request(tmp_path, store, manifest)
+    payload = IngestRequest(namespace="ns", sources=[{"path": "."}])
+
+    first = ingest(payload, request, Settings())
+    assert sorted(store.ids) == ["ns:faq/a.md:0", "ns:faq/b.md:0", "ns:ops.csv:0"]
+    assert first.stats["files_changed"] == 3 and first.stats["files_failed"] == 0
+
+    (tmp_path / "faq" / "a.md").unlink()
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+    second = ingest(payload, request, Settings())
+    assert store.deleted == [("ns:faq/a.md", 0, 1)]
+    assert second.stats["files_removed"] == 1
+    assert second.stats["files_failed"] == 1 and "broken.pdf" in second.stats["errors"]
+    assert sorted(manifest.load("ns")) == ["faq/b.md", "ops.csv"]
+
+
+def test_ingest_rejects_cross_document_dedup_for_source_syncs(tmp_path: Path):
+    _tree(tmp_path)
+    store = _Store()
+    request = _app_request(tmp_path, store, FileManifest(fakeredis.FakeRedis()))
+    settings = Settings(ingest_dedup=True, ingest_dedup_scope="request")
+
+    with pytest.raises(HTTPException) as excinfo:
+        ingest(IngestRequest(namespace="ns", sources=[{"path": "."}]), request, settings)
+    assert excinfo.value.status_code == 400
+    assert store.ids == []
+
+    with pytest.raises(ValidationError):
+        Settings(ingest_dedup_scope="requests")
@@ -1,9 +1,13 @@
+import asyncio
+import threading
+
 import pytest
 
 from app.schemas import ChatRequest
-from app.services.embedding import EmbeddingService
+from app.services.embedding import EmbeddingBackend, EmbeddingService
 from app.services.guards import PIIRedactor, PromptGuard
 from app.services.pipeline import RagPipeline
+from app.services.relevance import RelevanceGate
 
 
 class DummyEmbedding(EmbeddingService):
@@ -15,7 +19,7 @@ class DummyEmbedding(EmbeddingService):
 
 
 class DummyVectorStore:
-    def similarity_search(self, *, namespace: str, vector, top_k: int):
+    def similarity_search(self, *, namespace: str, vector, top_k: int, filters=None):
         return [
             {"id": "doc1", "text": "Warehouse throughput is 220 pallets/h", "score": 0.1},
         ]
@@ -50,3 +54,226 @@ async def test_pipeline_masks_pii():
     assert "[REDACTED]" in response.answer
     assert response.sources
     assert llm.called_with["model"] == "mistral"
+
+
+class SlowLoadingBackend(EmbeddingBackend):
+    name = "slow"
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def load(self) -> None:
+        self.release.wait(timeout=5)
+
+    def encode(self, texts):
+        return [[0.1] * 4 for _ in texts]
+
+
+@pytest.mark.asyncio
+async def test_chat_does_not_block_event_loop_while_embedding_loads():
+    backend = SlowLoadingBackend()
+    pipeline = RagPipeline(
+        embedding=EmbeddingService("slow", backend=backend),
+        vector_store=DummyVectorStore(),
+        llm=DummyLLM(),
+        guard=PromptGuard(()),
+        redactor=PIIRedactor(),
+        max_context_chars=400,
+    )
+    chat = asyncio.create_task(
+        pipeline.chat(
+            ChatRequest(query="What is throughput?"),
+            namespace="demo",
+            model="mistral",
+            temperature=0.2,
+        )
+    )
+    await asyncio.sleep(0.05)
+    assert not chat.done()
+    backend.release.set()
+    assert (await chat).sources
+
+
+class ScoredVectorStore:
+    def __init__(self, scores: list[float]):
+        self.scores = scores
+
+    def similarity_search(self, *, namespace: str, vector, top_k: int, filters=None):
+        return [
+            {"id": f"doc{idx}", "text": f"chunk {idx}", "score": score}
+            for idx, score in enumerate(self.scores)
+        ]
+
+
+def _gated_pipeline(scores: list[float], llm: DummyLLM) -> RagPipeline:
+    return RagPipeline(
+        embedding=DummyEmbedding(),
+        vector_store=ScoredVectorStore(scores),
+        llm=llm,
+        guard=PromptGuard(()),
+        redactor=PIIRedactor(),
+        max_context_chars=400,
+        relevance=RelevanceGate(min_similarity=0.4, cliff_gap=0.15),
+    )
+
+
+@pytest.mark.asyncio
+async def test_relevance_gate_answers_not_found_without_llm():
+    llm = DummyLLM()
+    pipeline = _gated_pipeline([0.75, 0.8], llm)
+
+    response = await pipeline.chat(
+        ChatRequest(query="Who won the cup final?"),
+        namespace="demo",
+        model="mistral",
+        temperature=0.2,
+    )
+
+    assert llm.called_with == {}
+    assert response.answer == pipeline.relevance.not_found_answer
+    assert [source.document_id for source in response.sources] == ["doc0", "doc1"]
+    assert response.stats["llm_skipped"] is True
+
+
+@pytest.mark.asyncio
+async def test_adaptive_top_k_stops_at_score_cliff():
+    llm = DummyLLM()
+    pipeline = _gated_pipeline([0.2, 0.25, 0.55, 0.6], llm)
+
+    response = await pipeline.chat(
+        ChatRequest(query="What is throughput?"),
+        namespace="demo",
+        model="mistral",
+        temperature=0.2,
+    )
+
+    assert llm.called_with["model"] == "mistral"
+    assert [source.document_id for source in response.sources] == ["doc0", "doc1"]
+    assert response.stats["chunks_dropped"] == 2
+
+
+class BatchEmbedding(DummyEmbedding):
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def embed(self, texts):  # type: ignore[override]
+        self.calls.append(list(texts))
+        return [[0.1] * 4 for _ in texts]
+
+
+class BatchVectorStore(ScoredVectorStore):
+    def __init__(self):
+        super().__init__([0.1])
+        self.round_trips = 0
+
+    def similarity_search_many(self, *, namespace: str, searches):
+        self.round_trips += 1
+        return [
+            self.similarity_search(namespace=namespace, vector=vector, top_k=top_k)
+            for vector, top_k, _ in searches
+        ]
+
+
+@pytest.mark.asyncio
+async def test_chat_many_embeds_and_searches_once():
+    embedding = BatchEmbedding()
+    store = BatchVectorStore()
+    pipeline = RagPipeline(
+        embedding=embedding,
+        vector_store=store,
+        llm=DummyLLM(),
+        guard=PromptGuard(("shutdown",)),
+        redactor=PIIRedactor(),
+        max_context_chars=400,
+    )
+    queries = ["Dock throughput?", "Please shutdown the WMS", "Cold zone temperature?"]
+
+    results = [
+        item
+        async for item in pipeline.chat_many(
+            [ChatRequest(query=query) for query in queries],
+            namespace="demo",
+            model="mistral",
+            temperature=0.2,
+            concurrency=2,
+        )
+    ]
+
+    by_index = dict(results)
+    assert sorted(by_index) == [0, 1, 2]
+    assert by_index[1].guard_tripped
+    assert "[REDACTED]" in by_index[2].answer
+    assert embedding.calls == [["Dock throughput?", "Cold zone temperature?"]]
+    assert store.round_trips == 1
+
+
+class FailingFilterStore(BatchVectorStore):
+    def similarity_search(self, *, namespace: str, vector, top_k: int, filters=None):
+        if filters:
+            raise ValueError("unknown filter field 'aisle'")
+        return super().similarity_search(namespace=namespace, vector=vector, top_k=top_k)
+
+    def similarity_search_many(self, *, namespace: str, searches):
+        raise ValueError("unknown filter field 'aisle'")
+
+
+@pytest.mark.asyncio
+async def test_chat_many_reports_retrieval_errors_per_item():
+    pipeline = RagPipeline(
+        embedding=BatchEmbedding(),
+        vector_store=FailingFilterStore(),
+        llm=DummyLLM(),
+        guard=PromptGuard(()),
+        redactor=PIIRedactor(),
+        max_context_chars=400,
+    )
+    requests = [
+        ChatRequest(query="Dock throughput?"),
+        ChatRequest(query="Aisle rules?", filters={"aisle": "7"}),
+    ]
+
+    by_index = dict(
+        [
+            item
+            async for item in pipeline.chat_many(
+                requests, namespace="demo", model="mistral", temperature=0.2
+            )
+        ]
+    )
+
+    assert isinstance(by_index[1], ValueError)
+    assert by_index[0].sources
+
+
+class FlakyLLM(DummyLLM):
+    async def generate(
+        self, prompt: str, model: str | None = None, temperature: float | None = None
+    ):
+        if "Cold" in prompt:
+            raise KeyError("response")
+        return await super().generate(prompt, model=model, temperature=temperature)
+
+
+@pytest.mark.asyncio
+async def test_chat_many_reports_generation_errors_per_item():
+    pipeline = RagPipeline(
+        embedding=BatchEmbedding(),
+        vector_store=BatchVectorStore(),
+        llm=FlakyLLM(),
+        guard=PromptGuard(()),
+        redactor=PIIRedactor(),
+        max_context_chars=400,
+    )
+    requests = [ChatRequest(query="Dock throughput?"), ChatRequest(query="Cold zone?")]
+
+    by_index = dict(
+        [
+            item
+            async for item in pipeline.chat_many(
+                requests, namespace="demo", model="mistral", temperature=0.2
+            )
+        ]
+    )
+
+    assert isinstance(by_index[1], KeyError)
+    assert by_index[0].answer
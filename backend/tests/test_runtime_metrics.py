@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY, CollectorRegistry, Counter
+
+from app.services.runtime_metrics import MetricsExporter, RuntimeMonitor
+
+
+@pytest.mark.asyncio
+async def test_exporter_serves_cached_output_within_ttl():
+    exporter = MetricsExporter(ttl=60)
+    exporter.registry = CollectorRegistry()
+    counter = Counter("cache_probe", "Changes between renders", registry=exporter.registry)
+    first = await exporter.render()
+    counter.inc()
+    assert await exporter.render() is first
+
+    exporter.ttl = 0
+    assert await exporter.render() != first
+
+
+def test_monitor_samples_executor_backlog_and_redis_pool():
+    pool = SimpleNamespace(_in_use_connections={object(), object()}, _available_connections=[1])
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        monitor = RuntimeMonitor(executor=executor, redis_pool=pool)
+        monitor.sample()
+
+    assert REGISTRY.get_sample_value("rag_executor_queue_depth") == 0
+    assert REGISTRY.get_sample_value("rag_redis_pool_connections", {"state": "in_use"}) == 2
+    assert REGISTRY.get_sample_value("rag_redis_pool_connections", {"state": "idle"}) == 1
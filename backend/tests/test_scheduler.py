@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from app.services.scheduler import BATCH, INTERACTIVE, PrioritySlots
+
+
+@pytest.mark.asyncio
+async def test_batch_never_takes_the_reserved_interactive_slot():
+    slots = PrioritySlots(limit=2, reserved=1)
+    await slots.acquire(BATCH)
+
+    queued_batch = asyncio.create_task(slots.acquire(BATCH))
+    await asyncio.sleep(0)
+    assert not queued_batch.done()
+
+    await asyncio.wait_for(slots.acquire(INTERACTIVE), timeout=1)
+    assert slots.in_use == 2
+
+    slots.release()
+    await asyncio.sleep(0)
+    assert not queued_batch.done()
+
+    slots.release()
+    await asyncio.wait_for(queued_batch, timeout=1)
+    assert slots.in_use == 1
+
+
+@pytest.mark.asyncio
+async def test_waiting_interactive_requests_go_before_batch():
+    slots = PrioritySlots(limit=1, reserved=0)
+    order: list[str] = []
+    await slots.acquire(INTERACTIVE)
+
+    async def run(name: str, priority: int) -> None:
+        async with slots.slot(priority):
+            order.append(name)
+
+    tasks = [
+        asyncio.create_task(run("batch", BATCH)),
+        asyncio.create_task(run("live", INTERACTIVE)),
+    ]
+    await asyncio.sleep(0)
+    slots.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["live", "batch"]
+    assert slots.in_use == 0
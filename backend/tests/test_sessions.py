@@ -0,0 +1,135 @@
+import fakeredis
+import pytest
+
+from app.schemas import ChatRequest
+from app.services.guards import PIIRedactor, PromptGuard
+from app.services.pipeline import RagPipeline
+from app.services.scheduler import PrioritySlots
+from app.services.sessions import HistorySummarizer, SessionStore, SessionTurn
+
+
+class DummyEmbedding:
+    def __init__(self):
+        self.queries: list[str] = []
+
+    def embed_query(self, text: str):
+        self.queries.append(text)
+        return [0.1] * 4
+
+
+class DummyVectorStore:
+    def similarity_search(self, *, namespace: str, vector, top_k: int, filters=None):
+        return [{"id": "doc1", "text": "Zones C1-C3 are kept at 4 degrees", "score": 0.1}]
+
+
+class ScriptedLLM:
+    def __init__(self, responses: list[str]):
+        self.responses = list(responses)
+        self.prompts: list[str] = []
+
+    async def generate(self, prompt: str, model=None, temperature=None):
+        self.prompts.append(prompt)
+        return {"response": self.responses.pop(0)}
+
+
+def test_session_store_caps_turns_and_sets_ttl():
+    client = fakeredis.FakeRedis()
+    store = SessionStore(client, max_turns=3, ttl_seconds=60)
+    for idx in range(5):
+        store.append("abc", SessionTurn(query=f"q{idx}", answer=f"a{idx}"))
+    history = store.load("abc")
+    assert [turn.query for turn in history.turns] == ["q2", "q3", "q4"]
+    assert 0 < client.ttl("session:abc:turns") <= 60
+
+
+@pytest.mark.asyncio
+async def test_summarizer_folds_older_turns():
+    client = fakeredis.FakeRedis()
+    store = SessionStore(client)
+    for idx in range(4):
+        store.append("abc", SessionTurn(query="q" * 40, answer=f"answer {idx} " * 10))
+    summarizer = HistorySummarizer(ScriptedLLM(["User asked about zones."]), token_budget=50)
+    history = store.load("abc")
+    assert summarizer.needs_compaction(history)
+    summary, folded = await summarizer.summarize(history)
+    store.compact("abc", summary, history.turns[:folded])
+    compacted = store.load("abc")
+    assert compacted.summary == "User asked about zones."
+    assert len(compacted.turns) == 2
+
+
+def test_compaction_keeps_turns_appended_after_the_snapshot():
+    store = SessionStore(fakeredis.FakeRedis(), max_turns=4)
+    for idx in range(4):
+        store.append("abc", SessionTurn(query=f"q{idx}", answer=f"a{idx}"))
+    snapshot = store.load("abc")
+    # Two turns arrive while the summary is generated; the cap pushes q0 and q1 out.
+    store.append("abc", SessionTurn(query="q4", answer="a4"))
+    store.append("abc", SessionTurn(query="q5", answer="a5"))
+
+    assert store.compact("abc", "summary of q0-q2", snapshot.turns[:3]) == 1
+    assert [turn.query for turn in store.load("abc").turns] == ["q3", "q4", "q5"]
+    assert store.compact("abc", "summary of q0-q2", snapshot.turns[:3]) == 0
+    assert [turn.query for turn in store.load("abc").turns] == ["q3", "q4", "q5"]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_rewrites_follow_up_and_records_turn():
+    store = SessionStore(fakeredis.FakeRedis())
+    store.append("s1", SessionTurn(query="Which zones are cooled?", answer="C1-C3 [S1]"))
+    embedding = DummyEmbedding()
+    llm = ScriptedLLM(["What temperature do zones C1-C3 hold?", "4 degrees [S1]"])
+    pipeline = RagPipeline(
+        embedding=embedding,
+        vector_store=DummyVectorStore(),
+        llm=llm,
+        guard=PromptGuard(()),
+        redactor=PIIRedactor(),
+        max_context_chars=400,
+        sessions=store,
+    )
+    response = await pipeline.chat(
+        ChatRequest(query="And how cold are they?", session_id="s1"),
+        namespace="demo",
+        model="mistral",
+        temperature=0.2,
+    )
+    assert embedding.queries == ["What temperature do zones C1-C3 hold?"]
+    assert "Which zones are cooled?" in llm.prompts[1]
+    assert response.stats["standalone_query"] == "What temperature do zones C1-C3 hold?"
+    assert [turn.query for turn in store.load("s1").turns][-1] == "And how cold are they?"
+
+
+@pytest.mark.asyncio
+async def test_rewrite_and_summary_hold_an_llm_slot():
+    store = SessionStore(fakeredis.FakeRedis())
+    for idx in range(4):
+        store.append("s1", SessionTurn(query="q" * 40, answer=f"answer {idx} " * 10))
+    slots = PrioritySlots(2)
+    occupied: list[int] = []
+
+    class SlotLLM(ScriptedLLM):
+        async def generate(self, prompt: str, model=None, temperature=None):
+            occupied.append(slots.in_use)
+            return await super().generate(prompt, model=model, temperature=temperature)
+
+    llm = SlotLLM(["Zones were discussed.", "How cold are zones C1-C3?", "4 degrees [S1]"])
+    pipeline = RagPipeline(
+        embedding=DummyEmbedding(),
+        vector_store=DummyVectorStore(),
+        llm=llm,
+        guard=PromptGuard(()),
+        redactor=PIIRedactor(),
+        max_context_chars=400,
+        sessions=store,
+        summarizer=HistorySummarizer(llm, token_budget=50),
+        scheduler=slots,
+    )
+    await pipeline.chat(
+        ChatRequest(query="And how cold are they?", session_id="s1"),
+        namespace="demo",
+        model="mistral",
+        temperature=0.2,
+    )
+    assert occupied == [1, 1, 1]
+    assert slots.in_use == 0
@@ -0,0 +1,89 @@
+from unittest.mock import MagicMock
+
+import fakeredis
+import pytest
+
+from app.services.vector_store import FilterError, MetadataSchema, RedisVectorStore
+
+SCHEMA = MetadataSchema(tag_fields=("site", "zone"), numeric_fields=("effective_date",))
+
+
+def test_compile_filters_into_tag_and_numeric_clauses():
+    compiled = SCHEMA.compile(
+        {
+            "site": "hamburg-nord",
+            "zone": ["C1", "F 2"],
+            "effective_date": {"gte": "2024-01-01", "lt": 1719792000},
+        }
+    )
+
+    assert compiled == (
+        r"@meta_site:{hamburg\-nord} @meta_zone:{C1 | F\ 2} "
+        "@meta_effective_date:[1704067200.0 (1719792000.0]"
+    )
+    with pytest.raises(FilterError):
+        SCHEMA.compile({"supplier": "acme"})
+    with pytest.raises(FilterError):
+        SCHEMA.compile({"effective_date": {"after": "2024-01-01"}})
+
+
+def test_upsert_writes_declared_metadata_as_index_fields():
+    store = RedisVectorStore(MagicMock(), index_name="idx", metadata_schema=SCHEMA)
+    pipe = store.client.pipeline.return_value
+
+    store.upsert(
+        namespace="wh",
+        documents=[
+            {
+                "id": "faq:0",
+                "text": "Cold zone",
+                "embedding": [0.1, 0.2],
+                "metadata": {"zone": ["C1", "C2"], "effective_date": "2024-01-01", "page": 3},
+            }
+        ],
+    )
+
+    mapping = pipe.hset.call_args.kwargs["mapping"]
+    assert mapping["meta_zone"] == "C1,C2"
+    assert mapping["meta_effective_date"] == 1704067200.0
+    assert "meta_site" not in mapping and "meta_page" not in mapping
+
+
+def test_rewrites_drop_filter_fields_missing_from_new_metadata():
+    client = fakeredis.FakeRedis()
+    store = RedisVectorStore(client, index_name="idx", metadata_schema=SCHEMA)
+    store.upsert(
+        namespace="wh",
+        documents=[
+            {
+                "id": "faq:0",
+                "text": "Cold zone",
+                "embedding": [0.1, 0.2],
+                "metadata": {"zone": "C1", "site": "HAM"},
+            }
+        ],
+    )
+
+    store.update_metadata({"faq:0": {"zone": "C2"}})
+    stored = client.hgetall(f"{store.prefix}:faq:0")
+    assert stored[b"meta_zone"] == b"C2"
+    assert b"meta_site" not in stored
+
+    store.upsert(
+        namespace="wh",
+        documents=[{"id": "faq:0", "text": "Cold zone", "embedding": [0.1, 0.2], "metadata": {}}],
+    )
+    assert b"meta_zone" not in client.hgetall(f"{store.prefix}:faq:0")
+
+
+def test_similarity_search_pushes_filters_into_knn_prefilter():
+    store = RedisVectorStore(MagicMock(), index_name="idx", metadata_schema=SCHEMA)
+    index = store.client.ft.return_value
+    index.search.return_value.docs = []
+
+    store.similarity_search(namespace="wh", vector=[0.1], top_k=3, filters={"site": "bremen"})
+
+    query = index.search.call_args.args[0]
+    assert query.query_string().startswith(
+        "(@namespace:{wh} @meta_site:{bremen})=>[KNN 3 @embedding $vec AS score]"
+    )
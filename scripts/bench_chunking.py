@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: legacy character chunker vs. structure-aware splitters."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+import sys
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "backend"))
+
+from app.config import get_settings  # noqa: E402
+from app.schemas import IngestDocument  # noqa: E402
+from app.services.chunking import (  # noqa: E402
+    Chunker,
+    TokenWindowSplitter,
+    default_splitters,
+    load_tokenizer,
+    tokenizer_source,
+)
+from app.services.ingestion import DocumentParser  # noqa: E402
+
+WORD_REGEX = re.compile(r"\w+")
+
+
+def load_corpus(data_dir: Path) -> dict[str, str]:
+    parser = DocumentParser(base_path=data_dir)
+    return {
+        "markdown": parser.load(IngestDocument(path="warehouse_faq.md")),
+        "csv": parser.load(IngestDocument(path="warehouse_ops.csv")),
+    }
+
+
+def shipped_window(tokenizer: str | None) -> TokenWindowSplitter:
+    """The token window /ingest uses: same budget, counted in the embedding model's wordpieces."""
+    settings = get_settings()
+    source = tokenizer or tokenizer_source(
+        settings.chunk_tokenizer, ROOT / settings.embedding_onnx_path, settings.embedding_model
+    )
+    return TokenWindowSplitter(
+        max_tokens=min(settings.chunk_max_tokens, settings.embedding_max_length - 2),
+        overlap_tokens=settings.chunk_overlap_tokens,
+        tokenizer=None if source == "none" else load_tokenizer(source),
+    )
+
+
+def chunk_corpus(
+    corpus: dict[str, str], strategy: str, window: TokenWindowSplitter | None = None
+) -> list[str]:
+    if strategy == "legacy":
+        chunker = Chunker()
+        return [chunk for text in corpus.values() for chunk in chunker.split(text)]
+    splitters = default_splitters(window)
+    return [
+        chunk.text for kind, text in corpus.items() for chunk in splitters[kind].split_text(text)
+    ]
+
+
+def measure_throughput(
+    corpus: dict[str, str], strategy: str, repeat: int, window: TokenWindowSplitter | None = None
+) -> tuple[float, float]:
+    scaled = {kind: "\n".join([text] * repeat) for kind, text in corpus.items()}
+    size_mb = sum(len(text) for text in scaled.values()) / 1_000_000
+    start = perf_counter()
+    count = len(chunk_corpus(scaled, strategy, window))
+    elapsed = perf_counter() - start
+    return count / elapsed, size_mb / elapsed
+
+
+def lexical_vectors(texts: list[str]) -> list[dict[str, float]]:
+    tokenized = [Counter(word.lower() for word in WORD_REGEX.findall(text)) for text in texts]
+    doc_freq = Counter(word for tokens in tokenized for word in tokens)
+    total = len(texts)
+    vectors = []
+    for tokens in tokenized:
+        vector = {
+            word: count * math.log(1 + total / doc_freq[word]) for word, count in tokens.items()
+        }
+        norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+        vectors.append({word: value / norm for word, value in vector.items()})
+    return vectors
+
+
+@lru_cache
+def embedder(model: str):
+    from app.services.embedding import EmbeddingService
+
+    return EmbeddingService(model)
+
+
+def rank(chunks: list[str], query: str, top_k: int, model: str | None) -> list[str]:
+    if model:
+        service = embedder(model)
+        chunk_vectors = service.embed(chunks)
+        query_vector = service.embed_query(query)
+        scores = [sum(a * b for a, b in zip(vector, query_vector)) for vector in chunk_vectors]
+    else:
+        vectors = lexical_vectors(chunks + [query])
+        query_vector = vectors[-1]
+        scores = [
+            sum(value * query_vector.get(word, 0.0) for word, value in vector.items())
+            for vector in vectors[:-1]
+        ]
+    order = sorted(range(len(chunks)), key=lambda idx: scores[idx], reverse=True)
+    return [chunks[idx] for idx in order[:top_k]]
+
+
+def retrieval_hit_rate(
+    chunks: list[str], questions: list[dict], top_k: int, model: str | None
+) -> float:
+    rates = []
+    for item in questions:
+        if not item.get("answerable", True):
+            continue
+        context = " ".join(rank(chunks, item["query"], top_k, model)).lower()
+        keywords = item.get("keywords", [])
+        rates.append(sum(kw.lower() in context for kw in keywords) / max(len(keywords), 1))
+    return sum(rates) / len(rates)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", type=Path, default=ROOT / "data")
+    parser.add_argument("--dataset", type=Path, default=ROOT / "data" / "eval_questions.json")
+    parser.add_argument("--repeat", type=int, default=2000, help="Corpus copies for throughput")
+    parser.add_argument("--top-k", type=int, default=1)
+    parser.add_argument(
+        "--embedding-model",
+        default=None,
+        help="Rank with this SentenceTransformer model instead of lexical TF-IDF",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        default=None,
+        help="tokenizer.json, directory or hub name for the structured splitters "
+        "(default: as configured for /ingest; 'none' counts whitespace words)",
+    )
+    args = parser.parse_args()
+
+    window = shipped_window(args.tokenizer)
+    corpus = load_corpus(args.data_dir)
+    questions = json.loads(args.dataset.read_text(encoding="utf-8"))
+    print(f"{'strategy':<12}{'chunks':>8}{'chunks/s':>14}{'MB/s':>10}{'hit@k':>8}")
+    for strategy in ("legacy", "structured"):
+        chunks = chunk_corpus(corpus, strategy, window)
+        per_second, mb_per_second = measure_throughput(corpus, strategy, args.repeat, window)
+        hit_rate = retrieval_hit_rate(chunks, questions, args.top_k, args.embedding_model)
+        print(
+            f"{strategy:<12}{len(chunks):>8}{per_second:>14,.0f}"
+            f"{mb_per_second:>10.1f}{hit_rate:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Index size, retrieval latency and recall with and without ingestion-time deduplication.
+
+Builds a corpus the way the ops exports grow in practice: the same CSV exported daily with a
+new timestamp column plus a few genuinely new rows, and FAQ revisions with small edits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import sys
+import zlib
+from pathlib import Path
+from statistics import mean
+from time import perf_counter
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "backend"))
+
+from app.services.chunking import default_splitters, iter_lines  # noqa: E402
+from app.services.dedup import ChunkDeduplicator, mask_timestamps  # noqa: E402
+
+WORD_REGEX = re.compile(r"\w+")
+DIM = 384
+
+
+def build_corpus(data_dir: Path, days: int, revisions: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    splitters = default_splitters()
+    header, *rows = (data_dir / "warehouse_ops.csv").read_text(encoding="utf-8").splitlines()
+    columns = ["exported_at", *header.split(",")]
+    faq = (data_dir / "warehouse_faq.md").read_text(encoding="utf-8")
+    documents: list[tuple[str, str, str]] = []
+    for day in range(days):
+        stamp = f"2024-{1 + day // 28 % 12:02d}-{1 + day % 28:02d}T06:00:00Z"
+        daily = list(rows) + [f"incident,ticket_{day},{rng.randint(1, 500)},count"]
+        lines = [
+            ", ".join(f"{k}={v}" for k, v in zip(columns, [stamp, *row.split(",")]))
+            for row in daily
+        ]
+        documents.append((f"ops_{day:03d}.csv", "csv", "\n".join(lines)))
+    words = WORD_REGEX.findall(faq)
+    for revision in range(revisions):
+        edited = faq.replace(rng.choice(words), rng.choice(words), 1)
+        documents.append((f"faq_r{revision:02d}.md", "markdown", edited))
+
+    chunks = []
+    for doc_id, kind, text in documents:
+        for idx, chunk in enumerate(splitters[kind].chunks(iter_lines(text))):
+            chunks.append(
+                {"id": f"{doc_id}:{idx}", "text": chunk.text, "metadata": {"source": doc_id}}
+            )
+    return chunks
+
+
+def hashed_vectors(texts: list[str]) -> np.ndarray:
+    """Lexical stand-in for the embedding model: normalized hashed bag of words."""
+    vectors = np.zeros((len(texts), DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in WORD_REGEX.findall(text.lower()):
+            vectors[row, zlib.crc32(word.encode("utf-8")) % DIM] += 1.0
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def embed(texts: list[str], model: str | None) -> np.ndarray:
+    if not model:
+        return hashed_vectors(texts)
+    from app.services.embedding import EmbeddingService
+
+    return np.asarray(EmbeddingService(model).embed(texts), dtype=np.float32)
+
+
+def deduplicate(chunks: list[dict], vectors: np.ndarray, strategy: str) -> tuple[list[int], float]:
+    if strategy == "none":
+        return list(range(len(chunks))), 0.0
+    dedup = ChunkDeduplicator(
+        embedding_similarity=0.95 if strategy == "text+emb/request" else 0.0,
+        per_document=strategy == "text/document",
+        merge_fields=("source",),
+    )
+    kept = []
+    start = perf_counter()
+    for idx, source in enumerate(chunks):
+        chunk = {**source, "metadata": dict(source["metadata"]), "embedding": vectors[idx]}
+        if not dedup.text_duplicate(chunk) and not dedup.embedding_duplicate(chunk):
+            kept.append(idx)
+    return kept, len(chunks) / (perf_counter() - start)
+
+
+def search(index: np.ndarray, queries: np.ndarray, top_k: int, rounds: int) -> tuple[list, float]:
+    start = perf_counter()
+    for _ in range(rounds):
+        scores = queries @ index.T
+        top = np.argsort(-scores, axis=1)[:, :top_k]
+    latency = (perf_counter() - start) / rounds / len(queries)
+    return top.tolist(), latency
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", type=Path, default=ROOT / "data")
+    parser.add_argument("--dataset", type=Path, default=ROOT / "data" / "eval_questions.json")
+    parser.add_argument("--days", type=int, default=365, help="Daily CSV exports to simulate")
+    parser.add_argument("--revisions", type=int, default=40, help="FAQ revisions to simulate")
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=50, help="Search repetitions for latency")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--embedding-model",
+        default=None,
+        help="Embed with this SentenceTransformer model instead of hashed bag of words",
+    )
+    args = parser.parse_args()
+
+    chunks = build_corpus(args.data_dir, args.days, args.revisions, args.seed)
+    vectors = embed([chunk["text"] for chunk in chunks], args.embedding_model)
+    questions = [
+        item
+        for item in json.loads(args.dataset.read_text(encoding="utf-8"))
+        if item.get("answerable", True)
+    ]
+    queries = embed([item["query"] for item in questions], args.embedding_model)
+    masked = [mask_timestamps(chunk["text"]) for chunk in chunks]
+
+    print(
+        f"{'strategy':<16}{'chunks':>8}{'reduction':>11}{'index MB':>10}"
+        f"{'dedup/s':>10}{'knn us':>9}{'hit@k':>7}{'distinct@k':>12}"
+    )
+    # text/document is INGEST_DEDUP_SCOPE's default; the other two compare across documents.
+    for strategy in ("none", "text/document", "text/request", "text+emb/request"):
+        kept, per_second = deduplicate(chunks, vectors, strategy)
+        size_mb = sum(DIM * 4 + len(chunks[idx]["text"].encode("utf-8")) for idx in kept) / 1e6
+        top, latency = search(vectors[kept], queries, args.top_k, args.rounds)
+        hits, distinct = [], []
+        for item, ranked in zip(questions, top):
+            context = " ".join(chunks[kept[idx]]["text"] for idx in ranked).lower()
+            keywords = item.get("keywords", [])
+            hits.append(sum(kw.lower() in context for kw in keywords) / max(len(keywords), 1))
+            distinct.append(len({masked[kept[idx]] for idx in ranked}) / len(ranked))
+        print(
+            f"{strategy:<16}{len(kept):>8}{1 - len(kept) / len(chunks):>10.1%}{size_mb:>10.2f}"
+            f"{per_second:>10,.0f}{latency * 1e6:>9.1f}{mean(hits):>7.2f}{mean(distinct):>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
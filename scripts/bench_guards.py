@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Benchmark: linear blocklist scan and per-pattern PII passes vs. the compiled guard engine."""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import string
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "backend"))
+
+from app.services.guards import PII_PATTERNS, PIIRedactor, PromptGuard  # noqa: E402
+
+LEGACY_PII_REGEXES = [re.compile(pattern) for pattern in PII_PATTERNS.values()]
+FILLER = (
+    "Dock 4 runs at 220 pallets per hour with three scanners per line. "
+    "Zones C1-C3 hold 4C, zones F1-F2 hold -18C. "
+)
+PROSE = (
+    "Pallets are stored in the cold zone and must be checked by the shift lead before dispatch. ",
+    "Use the scanner at the receiving gate and confirm the delivery note in the WMS. ",
+    "Escalate damaged goods to the inbound supervisor and attach a photo to the ticket. ",
+)
+PII_SAMPLES = [
+    "dispatch@warehouse.example",
+    "+49 170 1234567",
+    "DE89 3704 0044 0532 0130 00",
+    "HH-AB 1234",
+]
+
+
+def random_phrase(rng: random.Random) -> str:
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(3)]
+    return " ".join(words)
+
+
+def build_answer(rng: random.Random, size: int, figure_ratio: float) -> str:
+    parts: list[str] = []
+    length = 0
+    while length < size:
+        sentence = FILLER if rng.random() < figure_ratio else rng.choice(PROSE)
+        if rng.random() < 0.05:
+            sentence += f"Contact {rng.choice(PII_SAMPLES)} for details. "
+        parts.append(sentence)
+        length += len(sentence)
+    return "".join(parts)
+
+
+def legacy_check(blocklist: tuple[str, ...], text: str) -> bool:
+    lowered = text.lower()
+    return any(term in lowered for term in blocklist)
+
+
+def legacy_redact(text: str, mask: str = "[REDACTED]") -> str:
+    for pattern in LEGACY_PII_REGEXES:
+        text = pattern.sub(mask, text)
+    return text
+
+
+def timed(func: Callable[[str], object], inputs: list[str], rounds: int) -> float:
+    start = perf_counter()
+    for _ in range(rounds):
+        for text in inputs:
+            func(text)
+    return (perf_counter() - start) / (rounds * len(inputs)) * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--terms", type=int, default=1000, help="Blocklist size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--answer-kb", type=int, default=16, help="Answer length in KB")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    blocklist = tuple(random_phrase(rng) for _ in range(args.terms))
+    queries = []
+    for idx in range(args.queries):
+        filler = FILLER[: rng.randint(40, 160)]
+        term = blocklist[rng.randrange(args.terms)] if idx % 10 == 0 else ""
+        queries.append(f"{filler} {term}")
+    guard = PromptGuard(blocklist)
+    assert [legacy_check(blocklist, q) for q in queries] == [
+        guard._matcher.search(q.lower()) is not None for q in queries
+    ]
+
+    size = args.answer_kb * 1024
+    answers = {
+        "prose": [build_answer(rng, size, figure_ratio=0.1) for _ in range(8)],
+        "figure-dense": [build_answer(rng, size, figure_ratio=1.0) for _ in range(8)],
+    }
+    redactor = PIIRedactor()
+
+    print(f"blocklist: {args.terms} terms, {args.queries} queries")
+    legacy_us = timed(lambda text: legacy_check(blocklist, text), queries, args.rounds)
+    compiled_us = timed(lambda text: guard.check(text), queries, args.rounds)
+    print(f"  linear any(term in text)   {legacy_us:10.1f} us/query")
+    print(f"  PromptGuard (Aho-Corasick) {compiled_us:10.1f} us/query  (incl. injection regex)")
+
+    for kind, texts in answers.items():
+        assert [legacy_redact(text) for text in texts] == [redactor.redact(text) for text in texts]
+        print(f"redaction: {args.answer_kb} KB {kind} answers, {len(PII_PATTERNS)} rules")
+        legacy_us = timed(legacy_redact, texts, args.rounds)
+        compiled_us = timed(redactor.redact_with_report, texts, args.rounds)
+        print(f"  one re.sub per rule        {legacy_us:10.1f} us/answer")
+        print(f"  anchored single pass       {compiled_us:10.1f} us/answer  (with rule report)")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,24 +25,54 @@ def score_answer(answer: str, keywords: Sequence[str]) -> float:
     return hits / len(keywords)
 
 
-def run_eval(api_base: str, dataset_path: Path) -> None:
+def run_eval(api_base: str, dataset_path: Path, thresholds: Sequence[float]) -> None:
     questions = load_dataset(dataset_path)
-    stats: list[tuple[str, float]] = []
+    results: list[tuple[dict, float, float | None]] = []
     for item in questions:
         query = item["query"]
+        payload: dict = {"query": query}
+        if thresholds:
+            # Gate disabled so every question reports its best similarity.
+            payload["min_similarity"] = 0.0
         response = requests.post(
             f"{api_base.rstrip('/')}/chat",
-            json={"query": query},
+            json=payload,
             timeout=90,
         )
         response.raise_for_status()
         payload = response.json()
+        stats = payload.get("stats", {})
         score = score_answer(payload.get("answer", ""), item.get("keywords", []))
-        stats.append((query, score))
-        print(f"Q: {query}\n-> score: {score:.2f}, model: {payload.get('stats', {}).get('model')}\n")
+        results.append((item, score, stats.get("best_similarity")))
+        print(
+            f"Q: {query}\n-> score: {score:.2f}, model: {stats.get('model')}, "
+            f"best_similarity: {stats.get('best_similarity')}, "
+            f"gate: {stats.get('relevance_gate', 'answer')}\n"
+        )
+
+    answerable = [score for item, score, _ in results if item.get("answerable", True)]
+    if answerable:
+        print(f"Mean keyword hit-rate: {sum(answerable) / len(answerable):.2f}")
+    if thresholds:
+        sweep_thresholds(results, thresholds)
 
-    mean_score = sum(score for _, score in stats) / len(stats)
-    print(f"Mean keyword hit-rate: {mean_score:.2f}")
+
+def sweep_thresholds(
+    results: Sequence[tuple[dict, float, float | None]], thresholds: Sequence[float]
+) -> None:
+    print("\nthreshold  answered  not_found  missed_answerable  llm_on_unanswerable")
+    for threshold in thresholds:
+        gated = [(item, (similarity or 0.0) < threshold) for item, _, similarity in results]
+        missed = sum(1 for item, blocked in gated if blocked and item.get("answerable", True))
+        wasted = sum(
+            1 for item, blocked in gated if not blocked and not item.get("answerable", True)
+        )
+        not_found = sum(1 for _, blocked in gated if blocked)
+        print(
+            f"{threshold:>9.2f}  {len(gated) - not_found:>8}  {not_found:>9}  "
+            f"{missed:>17}  {wasted:>19}"
+        )
+    print("RELEVANCE_MIN_SIMILARITY: highest threshold without missed answerable questions.")
 
 
 if __name__ == "__main__":
@@ -58,5 +88,11 @@ if __name__ == "__main__":
         default=Path("data/eval_questions.json"),
         help="Path to evaluation dataset",
     )
+    parser.add_argument(
+        "--sweep",
+        type=lambda value: [float(item) for item in value.split(",") if item],
+        default=[],
+        help="Comma-separated relevance thresholds to evaluate, e.g. 0.2,0.3,0.4",
+    )
     args = parser.parse_args()
-    run_eval(args.api_base, args.dataset)
+    run_eval(args.api_base, args.dataset, args.sweep)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Export the embedding model to ONNX, quantize it to int8 and verify cosine parity with torch."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import sys
+from pathlib import Path
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "backend"))
+
+from app.schemas import IngestDocument  # noqa: E402
+from app.services.chunking import default_splitters  # noqa: E402
+from app.services.embedding import (  # noqa: E402
+    ONNX_MODEL_FILE,
+    ONNX_QUANTIZED_FILE,
+    EmbeddingBackend,
+    OnnxBackend,
+    SentenceTransformerBackend,
+)
+from app.services.ingestion import DocumentParser  # noqa: E402
+
+
+def export(model_name: str, output: Path, opset: int, quantize: bool) -> None:
+    import torch
+
+    backend = SentenceTransformerBackend(model_name, device="cpu")
+    backend.load()
+    transformer = backend.model[0].auto_model.eval()
+    output.mkdir(parents=True, exist_ok=True)
+    backend.model.tokenizer.save_pretrained(str(output))
+
+    class Encoder(torch.nn.Module):
+        def __init__(self) -> None:
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.transformer(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids,
+            ).last_hidden_state
+
+    sample = backend.model.tokenizer(["warehouse dock throughput"], return_tensors="pt")
+    axes = {0: "batch", 1: "tokens"}
+    with torch.no_grad():
+        torch.onnx.export(
+            Encoder(),
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            str(output / ONNX_MODEL_FILE),
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": axes,
+                "attention_mask": axes,
+                "token_type_ids": axes,
+                "last_hidden_state": axes,
+            },
+            opset_version=opset,
+            dynamo=False,
+        )
+    print(f"exported {output / ONNX_MODEL_FILE}")
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(
+            str(output / ONNX_MODEL_FILE),
+            str(output / ONNX_QUANTIZED_FILE),
+            weight_type=QuantType.QInt8,
+        )
+        print(f"quantized {output / ONNX_QUANTIZED_FILE}")
+
+
+def sample_texts(data_dir: Path, dataset: Path) -> list[str]:
+    parser = DocumentParser(base_path=data_dir)
+    splitters = default_splitters()
+    texts = [item["query"] for item in json.loads(dataset.read_text(encoding="utf-8"))]
+    for kind, path in (("markdown", "warehouse_faq.md"), ("csv", "warehouse_ops.csv")):
+        text = parser.load(IngestDocument(path=path))
+        texts.extend(chunk.text for chunk in splitters[kind].split_text(text))
+    return texts
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def profile(backend: EmbeddingBackend, texts: list[str]) -> tuple[list[list[float]], dict]:
+    rss = peak_rss_mb()
+    start = perf_counter()
+    backend.load()
+    load_seconds = perf_counter() - start
+    vectors = backend.encode(texts)
+    start = perf_counter()
+    for text in texts:
+        backend.encode([text])
+    query_ms = (perf_counter() - start) / len(texts) * 1000
+    return vectors, {
+        "load_s": load_seconds,
+        "query_ms": query_ms,
+        "rss_mb": peak_rss_mb() - rss,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument(
+        "--output", type=Path, default=ROOT / "backend" / "models" / "all-MiniLM-L6-v2"
+    )
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--no-quantize", action="store_true")
+    parser.add_argument("--verify-only", action="store_true", help="Skip the export step")
+    parser.add_argument("--data-dir", type=Path, default=ROOT / "data")
+    parser.add_argument("--dataset", type=Path, default=ROOT / "data" / "eval_questions.json")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    if not args.verify_only:
+        export(args.model, args.output, args.opset, quantize=not args.no_quantize)
+
+    texts = sample_texts(args.data_dir, args.dataset)
+    # ONNX first: peak RSS only grows. Run with --verify-only for RSS deltas without torch loaded.
+    candidates = {"onnx-fp32": OnnxBackend(args.output, quantized=False)}
+    if (args.output / ONNX_QUANTIZED_FILE).exists():
+        candidates["onnx-int8"] = OnnxBackend(args.output, quantized=True)
+    results = {name: profile(backend, texts) for name, backend in candidates.items()}
+    reference, reference_stats = profile(
+        SentenceTransformerBackend(args.model, device="cpu"), texts
+    )
+
+    print(f"{len(texts)} texts")
+    print(
+        f"{'backend':<12}{'load s':>8}{'ms/query':>10}{'rss MB':>9}{'min cos':>9}{'mean cos':>10}"
+    )
+    print(
+        f"{'torch':<12}{reference_stats['load_s']:>8.2f}{reference_stats['query_ms']:>10.2f}"
+        f"{reference_stats['rss_mb']:>9.0f}{1.0:>9.4f}{1.0:>10.4f}"
+    )
+    failed = False
+    for name, (vectors, stats) in results.items():
+        cosines = [sum(a * b for a, b in zip(x, y)) for x, y in zip(vectors, reference)]
+        worst = min(cosines)
+        failed |= worst < args.min_cosine
+        print(
+            f"{name:<12}{stats['load_s']:>8.2f}{stats['query_ms']:>10.2f}{stats['rss_mb']:>9.0f}"
+            f"{worst:>9.4f}{sum(cosines) / len(cosines):>10.4f}"
+        )
+    if failed:
+        print(f"parity check failed: cosine below {args.min_cosine}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
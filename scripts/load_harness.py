@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""Closed-loop load test for /chat with a mixed query distribution and rising concurrency.
+
+Pair with ``scripts/stub_ollama.py`` to measure the backend without a GPU.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+from collections import defaultdict
+from dataclasses import dataclass, field
+from itertools import count
+from pathlib import Path
+from time import perf_counter
+
+import httpx
+
+QUERY_KINDS = ("repeat", "near_duplicate", "cold")
+# HTTP 200 outcomes; only "answered" went through the LLM and counts as a success.
+OUTCOMES = ("answered", "not_found", "guard_blocked")
+COLD_TOPICS = (
+    "Retourenabwicklung",
+    "Gefahrgutlagerung",
+    "Staplerwartung",
+    "Inventurdifferenzen",
+    "Cross-Docking",
+    "Leergutannahme",
+    "Nachtschicht-Übergabe",
+    "Zollabfertigung",
+)
+
+
+@dataclass
+class Sample:
+    kind: str
+    latency: float
+    error: str | None = None
+    outcome: str = "answered"
+
+    @property
+    def answered(self) -> bool:
+        return not self.error and self.outcome == "answered"
+
+
+@dataclass
+class StageResult:
+    concurrency: int
+    elapsed: float
+    samples: list[Sample] = field(default_factory=list)
+
+    @property
+    def errors(self) -> int:
+        return sum(1 for sample in self.samples if sample.error)
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / len(self.samples) if self.samples else 0.0
+
+    @property
+    def throughput(self) -> float:
+        answered = sum(1 for sample in self.samples if sample.answered)
+        return answered / self.elapsed if self.elapsed else 0.0
+
+    def latencies(self, kind: str | None = None) -> list[float]:
+        return sorted(
+            sample.latency
+            for sample in self.samples
+            if sample.answered and (kind is None or sample.kind == kind)
+        )
+
+    def summary(self) -> dict:
+        latencies = self.latencies()
+        error_kinds: dict[str, int] = defaultdict(int)
+        for sample in self.samples:
+            if sample.error:
+                error_kinds[sample.error] += 1
+        return {
+            "concurrency": self.concurrency,
+            "requests": len(self.samples),
+            "errors": dict(error_kinds),
+            "outcomes": {
+                outcome: sum(
+                    1 for sample in self.samples if not sample.error and sample.outcome == outcome
+                )
+                for outcome in OUTCOMES
+            },
+            "error_rate": round(self.error_rate, 4),
+            "throughput_rps": round(self.throughput, 3),
+            **{f"p{q}_ms": _ms(percentile(latencies, q)) for q in (50, 95, 99)},
+            "by_kind": {
+                kind: {
+                    "requests": sum(1 for sample in self.samples if sample.kind == kind),
+                    "p50_ms": _ms(percentile(self.latencies(kind), 50)),
+                    "p95_ms": _ms(percentile(self.latencies(kind), 95)),
+                }
+                for kind in QUERY_KINDS
+            },
+        }
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _ms(value: float | None) -> float | None:
+    return None if value is None else round(value * 1000, 1)
+
+
+class QueryMix:
+    """Draws exact repeats of hot queries, light rewrites of them, or never-seen queries."""
+
+    def __init__(
+        self, hot: list[str], repeat: float, near_duplicate: float, rng: random.Random
+    ) -> None:
+        if repeat + near_duplicate > 1:
+            raise ValueError("repeat + near_duplicate must not exceed 1")
+        self.hot = hot
+        self.repeat = repeat
+        self.near_duplicate = near_duplicate
+        self.rng = rng
+        self._cold = count()
+
+    def next(self) -> tuple[str, str]:
+        draw = self.rng.random()
+        if draw < self.repeat:
+            return "repeat", self.rng.choice(self.hot)
+        if draw < self.repeat + self.near_duplicate:
+            return "near_duplicate", self.perturb(self.rng.choice(self.hot))
+        return "cold", self.cold()
+
+    def perturb(self, query: str) -> str:
+        variant = self.rng.randrange(4)
+        if variant == 0:
+            return query.lower()
+        if variant == 1:
+            return query.rstrip("?") + " bitte?"
+        if variant == 2:
+            return "Kurze Frage: " + query
+        return "  ".join(query.split(" "))
+
+    def cold(self) -> str:
+        number = next(self._cold)
+        topic = COLD_TOPICS[number % len(COLD_TOPICS)]
+        return f"Welche Regeln gelten für {topic} in Halle {number // len(COLD_TOPICS) + 1}?"
+
+
+async def run_stage(
+    client: httpx.AsyncClient,
+    url: str,
+    mix: QueryMix,
+    concurrency: int,
+    duration: float,
+    payload: dict,
+) -> StageResult:
+    samples: list[Sample] = []
+    deadline = perf_counter() + duration
+
+    async def worker() -> None:
+        while perf_counter() < deadline:
+            kind, query = mix.next()
+            started = perf_counter()
+            error = None
+            outcome = "answered"
+            try:
+                response = await client.post(url, json={**payload, "query": query})
+                if response.status_code != 200:
+                    error = f"http_{response.status_code}"
+                else:
+                    outcome = classify(response.json())
+            except httpx.HTTPError as exc:
+                error = type(exc).__name__
+            samples.append(Sample(kind, perf_counter() - started, error, outcome))
+
+    started = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return StageResult(concurrency, perf_counter() - started, samples)
+
+
+def classify(body: dict) -> str:
+    if body.get("guard_tripped"):
+        return "guard_blocked"
+    if (body.get("stats") or {}).get("relevance_gate") == "not_found":
+        return "not_found"
+    return "answered"
+
+
+def print_stage(summary: dict) -> None:
+    print(
+        f"{summary['concurrency']:>5}  {summary['requests']:>8}  "
+        f"{summary['throughput_rps']:>8.2f}  {summary['error_rate'] * 100:>6.1f}%  "
+        f"{_fmt(summary['p50_ms'])}  {_fmt(summary['p95_ms'])}  {_fmt(summary['p99_ms'])}"
+    )
+    for kind, stats in summary["by_kind"].items():
+        if stats["requests"]:
+            print(
+                f"{'':>5}  {kind:>14}: {stats['requests']} req, "
+                f"p50 {_fmt(stats['p50_ms']).strip()} ms, p95 {_fmt(stats['p95_ms']).strip()} ms"
+            )
+    skipped = {key: value for key, value in summary["outcomes"].items() if key != "answered"}
+    if any(skipped.values()):
+        print(f"{'':>5}  without LLM (excluded from rps/latency): {skipped}")
+    if summary["errors"]:
+        print(f"{'':>5}  errors: {summary['errors']}")
+
+
+def _fmt(value: float | None) -> str:
+    return f"{value:>8.1f}" if value is not None else f"{'-':>8}"
+
+
+async def run(args: argparse.Namespace) -> list[dict]:
+    dataset = json.loads(args.dataset.read_text(encoding="utf-8"))
+    mix = QueryMix(
+        [item["query"] for item in dataset if item.get("answerable", True)],
+        repeat=args.repeat,
+        near_duplicate=args.near_duplicate,
+        rng=random.Random(args.seed),
+    )
+    payload: dict = {"guard_level": "standard"}
+    if args.namespace:
+        payload["namespace"] = args.namespace
+    url = f"{args.api_base.rstrip('/')}/chat"
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    summaries = []
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        for _ in range(args.warmup):
+            await client.post(url, json={**payload, "query": mix.hot[0]})
+        print("  VUs  requests       rps   errors    p50 ms    p95 ms    p99 ms")
+        for concurrency in args.concurrency:
+            result = await run_stage(client, url, mix, concurrency, args.duration, payload)
+            summary = result.summary()
+            summaries.append(summary)
+            print_stage(summary)
+            if result.error_rate > args.max_error_rate:
+                print(f"Stopping: error rate above {args.max_error_rate:.0%}")
+                break
+    if args.slo_p95_ms:
+        passing = [
+            item["concurrency"]
+            for item in summaries
+            if item["p95_ms"] is not None
+            and item["p95_ms"] <= args.slo_p95_ms
+            and item["error_rate"] <= args.max_error_rate
+        ]
+        best = max(passing, default=None)
+        print(f"Highest concurrency within p95 <= {args.slo_p95_ms:.0f} ms: {best or 'none'}")
+    return summaries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Capacity-planning load test for /chat")
+    parser.add_argument("--api-base", default="http://localhost:8000")
+    parser.add_argument(
+        "--dataset",
+        type=Path,
+        default=Path("data/eval_questions.json"),
+        help="Hot queries used for repeats and near-duplicates",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(item) for item in value.split(",") if item],
+        default=[1, 2, 4, 8, 16],
+        help="Comma-separated concurrency stages (default: 1,2,4,8,16)",
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per stage")
+    parser.add_argument("--repeat", type=float, default=0.5, help="Share of exact repeats")
+    parser.add_argument(
+        "--near-duplicate", type=float, default=0.2, help="Share of reworded repeats"
+    )
+    parser.add_argument("--namespace", default=None)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--warmup", type=int, default=3, help="Unmeasured requests before stage 1")
+    parser.add_argument("--max-error-rate", type=float, default=0.05)
+    parser.add_argument("--slo-p95-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="Write stage summaries as JSON")
+    args = parser.parse_args()
+    results = asyncio.run(run(args))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
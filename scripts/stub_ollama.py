@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Deterministic Ollama stand-in for load tests without GPU or network.
+
+Implements the parts of the Ollama HTTP API the backend uses. ``/api/generate`` streams NDJSON
+tokens at a fixed rate after a prompt-length dependent time-to-first-token and ends with the
+usual ``done`` metadata (durations in nanoseconds). The same prompt always yields the same
+answer and timing, so runs are comparable across commits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from time import monotonic, perf_counter
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+VOCABULARY = (
+    "Paletten Dock Zone Kommissionierung Wareneingang Schicht Durchsatz Lagerplatz Kühlzone "
+    "Priorität Stapler Inventur Versand Tor Regal pro Stunde gemäß Handbuch werden die der im "
+    "nach bis und"
+).split()
+
+
+@dataclass
+class StubProfile:
+    tokens_per_second: float = 30.0
+    ttft_ms: float = 150.0
+    prefill_tokens_per_second: float = 2000.0
+    answer_tokens: int = 120
+    jitter: float = 0.1
+    parallel: int = 4
+    seed: int = 0
+
+
+def count_prompt_tokens(prompt: str) -> int:
+    return max(1, len(prompt) // 4)
+
+
+def plan_answer(prompt: str, profile: StubProfile) -> tuple[list[str], float]:
+    """Tokens and a timing factor derived from the prompt hash, so repeats are identical."""
+    digest = hashlib.sha256(f"{profile.seed}:{prompt}".encode("utf-8")).digest()
+    rng = random.Random(digest)
+    length = max(1, round(profile.answer_tokens * rng.uniform(0.8, 1.2)))
+    tokens = []
+    for position in range(length):
+        word = rng.choice(VOCABULARY)
+        if position % 12 == 0:
+            word = word.capitalize()
+        tokens.append(("" if position == 0 else " ") + word)
+        if position % 12 == 11 or position == length - 1:
+            tokens.append(".")
+    factor = 1.0 + rng.uniform(-profile.jitter, profile.jitter)
+    return tokens, factor
+
+
+def _line(payload: dict) -> bytes:
+    return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def create_app(profile: StubProfile, models: list[str]) -> FastAPI:
+    app = FastAPI(title="Ollama stub")
+    # Mirrors OLLAMA_NUM_PARALLEL: further requests queue before their first token.
+    slots = asyncio.Semaphore(max(1, profile.parallel))
+
+    async def generate_tokens(model: str, prompt: str):
+        tokens, factor = plan_answer(prompt, profile)
+        prompt_tokens = count_prompt_tokens(prompt)
+        started = perf_counter()
+        async with slots:
+            load_seconds = perf_counter() - started
+            prefill = (
+                profile.ttft_ms / 1000 + prompt_tokens / profile.prefill_tokens_per_second
+            ) * factor
+            await asyncio.sleep(prefill)
+            eval_started = perf_counter()
+            interval = factor / profile.tokens_per_second
+            deadline = monotonic()
+            for token in tokens:
+                yield {"model": model, "created_at": _now(), "response": token, "done": False}
+                deadline += interval
+                await asyncio.sleep(max(0.0, deadline - monotonic()))
+            finished = perf_counter()
+        yield {
+            "model": model,
+            "created_at": _now(),
+            "response": "",
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((finished - started) * 1e9),
+            # Time queued for a free slot; the closest stand-in for model load time.
+            "load_duration": int(load_seconds * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prefill * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int((finished - eval_started) * 1e9),
+        }
+
+    @app.get("/")
+    def root() -> PlainTextResponse:
+        return PlainTextResponse("Ollama is running")
+
+    @app.get("/api/version")
+    def version() -> dict:
+        return {"version": "0.0.0-stub"}
+
+    @app.get("/api/tags")
+    def tags() -> dict:
+        return {"models": [{"name": name, "model": name} for name in models]}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        model = body.get("model") or models[0]
+        prompt = body.get("prompt", "")
+        if body.get("stream", True):
+
+            async def stream():
+                async for item in generate_tokens(model, prompt):
+                    yield _line(item)
+
+            return StreamingResponse(stream(), media_type="application/x-ndjson")
+        chunks = []
+        async for item in generate_tokens(model, prompt):
+            if item["done"]:
+                return JSONResponse({**item, "response": "".join(chunks)})
+            chunks.append(item["response"])
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deterministic Ollama stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--tokens-per-second", type=float, default=30.0)
+    parser.add_argument("--ttft-ms", type=float, default=150.0, help="Fixed time-to-first-token")
+    parser.add_argument(
+        "--prefill-tps",
+        type=float,
+        default=2000.0,
+        help="Prompt tokens processed per second before the first token",
+    )
+    parser.add_argument("--answer-tokens", type=int, default=120, help="Mean answer length")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Timing spread, 0.1 = +-10%%")
+    parser.add_argument("--parallel", type=int, default=4, help="Concurrent generations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--models",
+        type=lambda value: [item for item in value.split(",") if item],
+        default=["mistral", "llama3"],
+        help="Comma-separated model names reported by /api/tags",
+    )
+    args = parser.parse_args()
+    stub_profile = StubProfile(
+        tokens_per_second=args.tokens_per_second,
+        ttft_ms=args.ttft_ms,
+        prefill_tokens_per_second=args.prefill_tps,
+        answer_tokens=args.answer_tokens,
+        jitter=args.jitter,
+        parallel=args.parallel,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(stub_profile, args.models), host=args.host, port=args.port)